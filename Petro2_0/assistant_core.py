@@ -1,10 +1,8 @@
 import os
 import threading
-import queue
 import json
 import re
 import logging
-import requests
 import time
 from collections import deque
 from PyQt6.QtCore import QObject, pyqtSignal, QTimer
@@ -17,11 +15,29 @@ from config import Config
 from system_io import SystemIO
 from fast_commands import FastCommandMatcher
 from memory import Memory
-from audio_utils import TTSEngine
-from command_executor import CommandExecutor
+from audio_utils import TTSEngine, PRIORITY_ALERT, PRIORITY_CHATTER
+from command_executor import CommandExecutor, DEFENSE_CAPABILITIES_TEXT, DEFENSE_ARCHITECTURE_TEXT
+from model_manager import ModelManager, LOADING, READY
+from llm_client import stream_openai, stream_gemini
+from llm_router import LLMRouter
+from http_client import HttpClient
+from llm_cache import LLMCache
+from request_scheduler import RequestScheduler
+from context_assembly import ContextAssembler
+from prompt_builder import PromptBuilder, to_gemini
+from stt_pipeline import ListenPipeline, AudioRingBuffer, LevelMeter, AudioRecorder, WAKE_ALIASES
 
 LOGGER = logging.getLogger(__name__)
 
+# Intents safe to fire from a Vosk partial result (no open-ended arguments)
+PARTIAL_SAFE_INTENTS = {"START_TIMER", "STOP_TIMER", "WINDOW_MANAGEMENT", "IOT_ACTION"}
+
+# Fixed, so it stays a reusable prompt prefix; per-request context goes into the last message
+SYSTEM_PROMPT = "Ти асистент Петруча."
+
+# End of a speakable sentence inside a streamed answer
+SENTENCE_END = re.compile(r'[.!?…;:]\s|\n')
+
 def normalize_text(raw) -> str:
     if not raw: return ""
     if isinstance(raw, dict):
@@ -40,10 +56,13 @@ def normalize_text(raw) -> str:
 class AssistantCore(QObject):
     sig_user_text = pyqtSignal(str)
     sig_bot_text = pyqtSignal(str)
+    sig_bot_partial = pyqtSignal(int, str)  # (answer id, streamed answer so far)
+    sig_bot_answer = pyqtSignal(int, str)  # (answer id, final text): replaces that answer's partial bubble
     sig_status = pyqtSignal(str)
     sig_mic_level = pyqtSignal(int)
     sig_timer_update = pyqtSignal(str)
     sig_timer_finished = pyqtSignal()
+    sig_models = pyqtSignal(str)
 
     def __init__(self):
         super().__init__()
@@ -51,6 +70,9 @@ class AssistantCore(QObject):
         self.sys = SystemIO()
         self.matcher = FastCommandMatcher()
         self.mem = Memory()
+        self.http = HttpClient()
+        self.llm_cache = LLMCache(ttl=self.cfg.get("llm_cache_ttl_s", 3600), size=self.cfg.get("llm_cache_size", 128),
+                                  db_path="llm_cache.db" if self.cfg.get("llm_cache_sqlite", False) else None)
         self.tts = TTSEngine(self.cfg)
         
         # Pass speak callback to executor
@@ -58,7 +80,15 @@ class AssistantCore(QObject):
 
         self.is_listening = False
         self.stop_event = threading.Event()
-        self.chat_history = deque(maxlen=6)
+        self.chat_history = deque(maxlen=40)  # PromptBuilder picks the window that fits the budget
+        self.history_lock = threading.Lock()
+        self.scheduler = RequestScheduler(self.process_input, workers=self.cfg.get("request_workers", 2),
+                                          deadline_s=self.cfg.get("request_deadline_s", 30))
+        self.context = ContextAssembler()
+        self._router, self._router_key = None, None
+        self._router_lock = threading.Lock()
+        self.prompts = PromptBuilder(SYSTEM_PROMPT, budget=self.cfg.get("llm_context_tokens", 3000),
+                                     turn_tokens=self.cfg.get("llm_turn_tokens", 400))
         self.last_interaction_time = 0
         self.active_conversation_timeout = 15
         
@@ -66,22 +96,61 @@ class AssistantCore(QObject):
         self.focus_timer.timeout.connect(self._on_timer_tick)
         self.timer_seconds_left = 0
         
-        self.vosk_model = None
+        # Heavy models load in the background; see vosk_model
+        self.models = ModelManager()
+        self.models.configure(budget_mb=self.cfg.get("model_memory_budget_mb", 0))
+        self.models.add_listener(self.sig_models.emit)
+        self._load_vosk()
+
+        self.tts.prerender(self._canned_phrases())
+
+    @property
+    def llm_router(self):
+        """LLMRouter over local_llm_url + local_llm_urls; None when there is only one server."""
+        urls = [u for u in dict.fromkeys([self.cfg.get("local_llm_url")] + list(self.cfg.get("local_llm_urls", []))) if u]
+        if len(urls) < 2: return None
+        key = (tuple(urls), self.cfg.get("llm_hedge", False), self.cfg.get("llm_hedge_delay_ms", 1000))
+        with self._router_lock:
+            if key != self._router_key:
+                if self._router: self._router.close()  # its pool and health thread would leak otherwise
+                self._router = LLMRouter(urls, hedge=key[1], hedge_delay_s=key[2] / 1000)
+                self._router_key = key
+            return self._router
+
+    @property
+    def vosk_model(self):
+        return self.models.get("vosk")
+
+    def _load_vosk(self):
         if os.path.exists("uk_v3/model"):
-            try: self.vosk_model = vosk.Model("uk_v3/model")
-            except: pass
+            self.models.load("vosk", lambda: vosk.Model("uk_v3/model"),
+                             idle_s=self.cfg.get("vosk_idle_unload_s", 0))
+
+    def _canned_phrases(self):
+        """Fixed replies worth having in the TTS cache before they are first needed."""
+        phrases = ["Таймер зупинено.", "Час вийшов!", "Запам'ятав.", "Робочий стіл.",
+                   "Починаю запис нотаток.", "Запис завершено.",
+                   DEFENSE_CAPABILITIES_TEXT, DEFENSE_ARCHITECTURE_TEXT]
+        phrases += [f"Таймер на {m} хвилин запущено." for m in (5, 10, 15, 25, 30)]
+        for e in self.cfg.get_entries():
+            name, etype = e.get("name", e.get("id", "")), e.get("type", "app")
+            if etype == "website": phrases.append(f"Відкриваю сайт: {name}")
+            elif etype in ("folder", "file"): phrases.append(f"Відкриваю: {name}")
+            else: phrases += [f"Запускаю: {name}", f"Запускаю {name}.", f"Закриваю {name}."]
+        phrases += [f"Режим '{ws.get('name')}' виконано." for ws in self.cfg.get_workspaces()]
+        return phrases
 
     # --- Timer ---
     def start_timer(self, minutes):
         self.timer_seconds_left = minutes * 60
         self.focus_timer.start(1000)
         self.sig_status.emit(f"Таймер: {minutes} хв")
-        self.tts.speak(f"Таймер на {minutes} хвилин запущено.")
+        self.tts.speak(f"Таймер на {minutes} хвилин запущено.", key="timer")
 
     def stop_timer(self):
         self.focus_timer.stop()
         self.sig_timer_update.emit("")
-        self.tts.speak("Таймер зупинено.")
+        self.tts.speak("Таймер зупинено.", key="timer")
 
     def _on_timer_tick(self):
         self.timer_seconds_left -= 1
@@ -90,7 +159,7 @@ class AssistantCore(QObject):
         if self.timer_seconds_left <= 0:
             self.focus_timer.stop()
             self.sig_timer_finished.emit()
-            self.tts.speak("Час вийшов!")
+            self.tts.speak("Час вийшов!", priority=PRIORITY_ALERT)
 
     # --- Output ---
     def speak_and_log(self, text):
@@ -98,6 +167,12 @@ class AssistantCore(QObject):
         if not self.cfg.get("muted", False):
             self.tts.speak(text)
 
+    def barge_in(self):
+        """The user addressed the assistant while it talks: stop talking."""
+        if not self.cfg.get("tts_barge_in", False) or not self.tts.is_speaking(): return
+        LOGGER.info("Barge-in: speech cancelled")
+        self.tts.cancel()
+
     # --- Input ---
     def start_listening(self):
         self.stop_event.clear()
@@ -111,7 +186,7 @@ class AssistantCore(QObject):
         self.sig_status.emit("Очікую")
 
     def manual_input(self, text):
-        threading.Thread(target=self.process_input, args=(text,), daemon=True).start()
+        self.scheduler.submit(text, "manual")
 
     def _listen_loop(self):
         mode = self.cfg.get("stt_backend", "vosk")
@@ -129,40 +204,78 @@ class AssistantCore(QObject):
                     if text: self._check_wake_word_and_process(text)
                 except: pass
         else:
+            self.models.hold("vosk")  # no idle eviction while listening
+            # Evicted while idle: load it again for this session
+            if self.models.state("vosk") != READY: self._load_vosk()
+            if self.models.state("vosk") == LOADING:
+                # Started before the model is ready: wait for it instead of failing
+                self.sig_status.emit("Завантаження Vosk...")
+                self.models.get("vosk", timeout=300)
+                if not self.stop_event.is_set(): self.sig_status.emit("Слухаю...")
             if not self.vosk_model:
+                self.models.release("vosk")
                 self.sig_status.emit("Vosk Error")
                 return
-            q = queue.Queue()
+            ring = AudioRingBuffer(seconds=30)  # bounded: ~1 MB
             def cb(indata, frames, time, status):
-                q.put(bytes(indata))
-                import numpy as np
-                vol = int(np.linalg.norm(np.frombuffer(indata, dtype=np.int16)) / 300)
-                self.sig_mic_level.emit(min(vol, 100))
+                ring.write(indata)
             try:
-                rec = vosk.KaldiRecognizer(self.vosk_model, 16000)
-                with sd.RawInputStream(samplerate=16000, blocksize=4000, dtype='int16', channels=1, callback=cb):
+                pipeline = ListenPipeline(self)
+                reader = ring.reader(4000)
+                pipeline.stats.reader = reader
+                meter = LevelMeter(ring, self.sig_mic_level.emit)
+                record_path = self.cfg.get("record_audio_path", "")
+                if record_path: AudioRecorder(ring, record_path, self.stop_event).start()
+                # Small device blocks keep the meter smooth; the recognizer still gets 4000
+                with sd.RawInputStream(samplerate=16000, blocksize=800, dtype='int16', channels=1, callback=cb):
                     while not self.stop_event.is_set():
-                        try:
-                            data = q.get(timeout=1)
-                            if rec.AcceptWaveform(data):
-                                res = json.loads(rec.Result())
-                                t = res.get("text", "")
-                                if t: self._check_wake_word_and_process(t)
-                        except queue.Empty: pass
-            except: pass
+                        block = reader.read(timeout=meter.interval)
+                        meter.update()
+                        if block is not None:
+                            pipeline.push(block.tobytes())
+                self.listen_stats = pipeline.close()
+            except Exception as e:
+                LOGGER.error(f"Vosk listen loop error: {e}")
+            finally:
+                self.models.release("vosk")
 
-    def _check_wake_word_and_process(self, text):
+    def _is_command_text(self, text):
+        """True if the grammar recognizer heard a complete fast command."""
+        if not text or "[unk]" in text: return False
+        cmd_text = self._strip_wake_word(text)
+        return bool(cmd_text) and self.matcher.match(cmd_text) is not None
+
+    def _try_partial_command(self, text):
+        """Runs a stable partial result if it is an unambiguous fast command."""
+        cmd_text = self._strip_wake_word(text)
+        if not cmd_text: return None
+        cmd = self.matcher.match(cmd_text)
+        if not cmd or cmd["intent"] not in PARTIAL_SAFE_INTENTS: return None
+        LOGGER.info(f"Partial command: {cmd_text} -> {cmd['intent']}")
+        self.scheduler.submit(cmd_text, "partial")
+        return cmd
+
+    def _is_partial_duplicate(self, text, fired):
+        """True if the final result repeats the command already fired from a partial."""
+        if not fired: return False
+        cmd_text = self._strip_wake_word(text)
+        if cmd_text is None or self.matcher.match(cmd_text) == fired:
+            LOGGER.info(f"Skipping final (already run from partial): {text}")
+            return True
+        return False
+
+    def _strip_wake_word(self, text):
+        """Returns the command part of text, or None if it is not addressed to us."""
         text = text.strip()
         lower_text = text.lower()
         wake_word_enabled = self.cfg.get("wake_word_enabled", True)
         
         if not wake_word_enabled:
-            self.process_input(text)
-            return
+            return text
 
         time_since_last = time.time() - self.last_interaction_time
         is_conversation_active = time_since_last < self.active_conversation_timeout
-        aliases = ["петро", "петруча", "асистент", "привіт"]
+        aliases = WAKE_ALIASES
         has_alias = any(a in lower_text for a in aliases)
 
         if is_conversation_active or has_alias:
@@ -171,23 +284,34 @@ class AssistantCore(QObject):
                     if lower_text.startswith(a):
                         text = text[len(a):].strip()
                         break
-            if text: self.process_input(text)
-        else:
-            print(f"[Ignored] {text}")
+            return text
+        return None
+
+    def _check_wake_word_and_process(self, text):
+        cmd_text = self._strip_wake_word(text)
+        if cmd_text is None:
+            print(f"[Ignored] {text.strip()}")
+        elif cmd_text:
+            self.scheduler.submit(cmd_text, "voice")
 
     def process_input(self, text):
         self.last_interaction_time = time.time()
         text = text.strip()
         if not text: return
+        self.models.milestone("first_command")
+
+        req = self.scheduler.current()  # None when called directly
 
         self.sig_user_text.emit(text)
         self.sig_status.emit("Думаю...")
-        self.chat_history.append({"role": "user", "content": text})
+        with self.history_lock:
+            self.chat_history.append({"role": "user", "content": text})
         
         fast_cmd = self.matcher.match(text)
-        response = None
+        if req: req.mark("match")
+        vision = bool(fast_cmd) and fast_cmd["intent"] == "VISION_QUERY"
         
-        if fast_cmd:
+        if fast_cmd and not vision:
             intent = fast_cmd["intent"]
             p = fast_cmd.get("params", {})
             
@@ -201,27 +325,48 @@ class AssistantCore(QObject):
             if self.executor.execute(fast_cmd):
                 return
 
-        if not response:
-            lower_text = text.lower()
-            if "знайди" in lower_text or "погугли" in lower_text:
-                self.sig_status.emit("Шукаю в інтернеті...")
-                response = self._web_search_agent(text)
+        # Only fast commands run for a superseded request; the slow part is dropped
+        if self._request_dropped(req): return
 
-        if not response:
-            memory_context = self.mem.search_facts(text)
-            response = self._llm_chat(text, memory_context=memory_context)
+        spoken = False
+        if vision:
+            # The executor only acknowledges VISION_QUERY; the answer comes from Gemini
+            self.sig_status.emit("Дивлюсь на екран...")
+            response = self._ask_gemini_vision(text)
+            if req: req.mark("vision")
+        else:
+            lower_text = text.lower()
+            searching = "знайди" in lower_text or "погугли" in lower_text
+            if searching: self.sig_status.emit("Шукаю в інтернеті...")
+            context = self._assemble_context(text, searching, req)
+            if req: req.mark("context")
+            if self._request_dropped(req): return
+            if self.cfg.get("llm_streaming", False):
+                response, spoken = self._llm_chat_streaming(text, memory_context=context)
+            else:
+                response = self._llm_chat(text, memory_context=context)
+            if req: req.mark("llm")
+        # A completed or already shown answer is always kept; a late one is just not spoken
+        if not response and self._request_dropped(req): return
 
         clean = normalize_text(response)
-        self.sig_bot_text.emit(clean)
-        self.chat_history.append({"role": "assistant", "content": clean})
+        self.sig_bot_answer.emit(req.id if req else 0, clean)
+        with self.history_lock:
+            self.chat_history.append({"role": "assistant", "content": clean})
         
-        if not self.cfg.get("muted", False):
+        if not self.cfg.get("muted", False) and not spoken and not (req and req.cancelled):
             self.sig_status.emit("Говорю...")
-            self.tts.speak(clean)
+            self.tts.speak(clean, priority=PRIORITY_CHATTER, key="answer")
         
         if self.is_listening: self.sig_status.emit("Слухаю...")
         else: self.sig_status.emit("Очікую")
 
+    def _request_dropped(self, req):
+        """True if the request was superseded or ran past its deadline."""
+        if not req or not req.cancelled: return False
+        if req.reason == "deadline": self.sig_bot_text.emit("Не встиг відповісти вчасно.")
+        return True
+
     # --- Modules ---
     def _ask_gemini_vision(self, text):
         key = self.cfg.get("gemini_key")
@@ -232,37 +377,178 @@ class AssistantCore(QObject):
         url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
         payload = {"contents": [{"parts": [{"text": f"{text}"}, {"inline_data": {"mime_type": "image/jpeg", "data": b64_img}}]}]}
         try:
-            r = requests.post(url, json=payload, timeout=20)
+            r = self.http.post("gemini", url, json=payload, timeout=self._llm_timeout("gemini"))
             if r.status_code == 200: return r.json()["candidates"][0]["content"]["parts"][0]["text"]
             return f"Gemini Error: {r.status_code}"
         except Exception as e: return f"Error: {e}"
 
-    def _web_search_agent(self, query):
-        res = self.sys.web_search(query)
-        return self._llm_chat(f"Query: {query}\nResults:\n{res}\nSummarize in Ukrainian.", system_override="Search Agent")
+    def _assemble_context(self, text, searching, req=None):
+        """
+        Memory facts and, for "знайди ..." queries, web results, fetched
+        concurrently under one deadline and merged into a single LLM call.
+        """
+        sources = {"memory": lambda: self.mem.search_facts(text)}
+        if searching:
+            sources["search"] = lambda: self.sys.web_search(text)
+            # Search takes seconds: let the local server process the prompt prefix meanwhile
+            if self.cfg.get("llm_prefix_warmup", False): self.context.background(lambda: self._warm_llm_prefix(text))
+        deadline = self.cfg.get("context_deadline_s", 5)
+        if req: deadline = min(deadline, req.remaining())
+        got = self.context.gather(sources, deadline, (lambda: req.cancelled) if req else None)
+        parts = [got.get("memory", "")]
+        if searching:
+            if got.get("search"): parts.append(f"Результати пошуку (коротко перекажи українською):\n{got['search']}")
+            else: parts.append("Пошук в інтернеті не дав результатів вчасно.")
+        return "\n".join(p for p in parts if p)
+
+    def _warm_llm_prefix(self, text):
+        """
+        One-token request with the system prompt and history, i.e. the prefix
+        of the real call, so a server with prompt caching (llama.cpp,
+        LM Studio) has it processed by the time the context is ready.
+        """
+        if self.cfg.get("llm_backend", "local") != "local": return
+        messages = self._llm_messages(text)[:-1]
+        if len(messages) < 2: return  # nothing beyond the system prompt worth warming
+        router = self.llm_router
+        # Warms the server the real call is most likely to go to
+        kind = "stream" if self.cfg.get("llm_streaming", False) else "plain"
+        url = f"{router.best_url(kind) if router else self.cfg.get('local_llm_url')}/v1/chat/completions"
+        payload = {"messages": messages, "max_tokens": 1, "cache_prompt": True}
+        t0 = time.perf_counter()
+        self.http.post("llm", url, json=payload, timeout=(3, 15)).close()
+        LOGGER.info(f"LLM prefix warm-up took {time.perf_counter() - t0:.2f}s")
+
+    def _llm_messages(self, text, system_override=None, memory_context=""):
+        """Chat messages shared by the plain and streaming calls (see PromptBuilder)."""
+        with self.history_lock: history = list(self.chat_history)
+        return self.prompts.build(history, text, memory_context, system_override)
+
+    def _llm_stream(self, text, memory_context=""):
+        """Text deltas from the configured backend; raises on transport errors."""
+        mode = self.cfg.get("llm_backend", "local")
+        messages = self._llm_messages(text, memory_context=memory_context)
+        if mode == "local":
+            router = self.llm_router
+            if router: return router.stream({"messages": messages}, timeout=self._llm_timeout("llm_pool"))
+            url = f"{self.cfg.get('local_llm_url')}/v1/chat/completions"
+            return stream_openai(url, {"messages": messages}, timeout=self._llm_timeout("llm"))
+        if mode == "gemini" and self.cfg.get("gemini_key"):
+            return stream_gemini(self.cfg.get("gemini_model", "gemini-1.5-flash"), self.cfg.get("gemini_key"), to_gemini(messages),
+                                 timeout=self._llm_timeout("gemini"))
+        raise ValueError(f"No streaming for backend '{mode}'")
+
+    def _llm_chat_streaming(self, text, memory_context=""):
+        """
+        Streams the answer into the chat bubble and hands finished sentences
+        to TTS while the rest is generated. Returns (answer, spoken); falls
+        back to _llm_chat if nothing arrived.
+        """
+        key = self._llm_cache_key(text, memory_context=memory_context)
+        cached = self.llm_cache.get(key) if key else None
+        if cached:
+            LOGGER.info("LLM cache hit")
+            return cached, False
+        t0 = time.perf_counter()
+        full, pending, last_emit = "", "", 0.0
+        speak = not self.cfg.get("muted", False)
+        req = self.scheduler.current()
+        group = f"answer-{req.id}" if req else "answer"  # exempts this answer's sentences from queue drops
+        interrupted = False
+        try:
+            for delta in self._llm_stream(text, memory_context=memory_context):
+                if req and req.cancelled:
+                    # Superseded or past the deadline: closing the generator drops the connection
+                    interrupted = True
+                    break
+                if not full: LOGGER.info(f"LLM first token after {time.perf_counter() - t0:.2f}s")
+                full += delta
+                now = time.perf_counter()
+                if now - last_emit > 0.05:  # repaint at most ~20 times a second
+                    self.sig_bot_partial.emit(req.id if req else 0, full)
+                    last_emit = now
+                # JSON/code answers are cleaned up at the end, not read out piecemeal
+                if speak and full.lstrip()[:1] in ("{", "[", "`"): speak = False
+                if not speak: continue
+                pending += delta
+                ends = list(SENTENCE_END.finditer(pending))
+                if ends:
+                    self.sig_status.emit("Говорю...")
+                    self.tts.speak(pending[:ends[-1].end()].strip(), priority=PRIORITY_CHATTER, group=group)
+                    pending = pending[ends[-1].end():]
+        except Exception as e:
+            LOGGER.error(f"LLM stream error: {e}")
+            if req and req.cancelled: interrupted = True  # timed out on the deadline: no second try
+            elif not full: return self._llm_chat(text, memory_context=memory_context), False
+            key = None  # incomplete answer
+        if interrupted:
+            # What was already shown stays, marked as cut off; the rest is neither cached nor spoken
+            LOGGER.info(f"LLM stream stopped ({req.reason}) after {time.perf_counter() - t0:.2f}s")
+            return (full + " …" if full else ""), True
+        if key and full: self.llm_cache.put(key, full)
+        if speak and pending.strip(): self.tts.speak(pending.strip(), priority=PRIORITY_CHATTER, group=group)
+        LOGGER.info(f"LLM stream done in {time.perf_counter() - t0:.2f}s ({len(full)} chars)")
+        return full, speak
+
+    def _llm_timeout(self, profile):
+        """The profile's (connect, read) timeout, capped by what is left of the current request's deadline."""
+        req = self.scheduler.current()
+        timeout = self.http.profile(profile)["timeout"]
+        if not req: return timeout
+        connect, read = timeout
+        left = max(0.5, req.remaining())
+        return (min(connect, left), min(read, left))
+
+    def _llm_failed(self, text):
+        """Error answer for the user; empty when the request ran out of time (process_input reports that)."""
+        req = self.scheduler.current()
+        return ("" if req and req.cancelled else text), False
+
+    def _llm_cache_key(self, text, system_override=None, memory_context="", bypass=False):
+        """Response-cache key for this request, or None when caching does not apply."""
+        if bypass or not self.cfg.get("llm_cache", False): return None
+        if not LLMCache.cacheable(text):
+            self.llm_cache.skip()
+            return None
+        mode = self.cfg.get("llm_backend", "local")
+        model = self.cfg.get("gemini_model", "gemini-1.5-flash") if mode == "gemini" else self.cfg.get("local_llm_url")
+        return LLMCache.key(mode, model, system_override or self.prompts.system, memory_context, text)
+
+    def _llm_chat(self, text, system_override=None, memory_context="", bypass_cache=False):
+        key = self._llm_cache_key(text, system_override, memory_context, bypass_cache)
+        cached = self.llm_cache.get(key) if key else None
+        if cached:
+            LOGGER.info("LLM cache hit")
+            return cached
+        answer, ok = self._llm_request(text, system_override, memory_context)
+        if ok and key: self.llm_cache.put(key, answer)
+        return answer
 
-    def _llm_chat(self, text, system_override=None, memory_context=""):
+    def _llm_request(self, text, system_override=None, memory_context=""):
+        """(answer, ok); on failure the answer is the error text shown to the user."""
         mode = self.cfg.get("llm_backend", "local")
-        context = "\n".join([f"{m['role']}: {m['content']}" for m in list(self.chat_history)[-6:]])
-        mem_str = f"\nFact: {memory_context}" if memory_context else ""
-        sys_prompt = system_override or f"Ти асистент Петруча.{mem_str}"
+        messages = self._llm_messages(text, system_override, memory_context)
         
         if mode == "local":
             url = f"{self.cfg.get('local_llm_url')}/v1/chat/completions"
             try:
-                payload = {"messages": [{"role": "system", "content": sys_prompt}, {"role": "user", "content": f"{context}\nUser: {text}"}]}
-                r = requests.post(url, json=payload, timeout=10)
-                return r.json()["choices"][0]["message"]["content"]
-            except: return "Local LLM Error"
+                router = self.llm_router
+                if router:
+                    data = router.complete({"messages": messages}, timeout=self._llm_timeout("llm_pool"))
+                    return data["choices"][0]["message"]["content"], True
+                r = self.http.post("llm", url, json={"messages": messages}, timeout=self._llm_timeout("llm"))
+                return r.json()["choices"][0]["message"]["content"], True
+            except Exception as e:
+                LOGGER.error(f"Local LLM error: {e}")
+                return self._llm_failed("Local LLM Error")
         elif mode == "gemini":
             key = self.cfg.get("gemini_key")
-            if not key: return "No Gemini Key."
+            if not key: return "No Gemini Key.", False
             model = self.cfg.get("gemini_model", "gemini-1.5-flash")
             url = f"https://generativelanguage.googleapis.com/v1beta/models/{model}:generateContent?key={key}"
-            payload = {"contents": [{"parts": [{"text": f"{sys_prompt}\n{context}\nUser: {text}"}]}]}
             try:
-                r = requests.post(url, json=payload, timeout=10)
-                if r.status_code == 200: return r.json()["candidates"][0]["content"]["parts"][0]["text"]
-                return f"Error {r.status_code}"
-            except Exception as e: return f"Net Error: {e}"
-        return "Unknown Backend"
\ No newline at end of file
+                r = self.http.post("gemini", url, json=to_gemini(messages), timeout=self._llm_timeout("gemini"))
+                if r.status_code == 200: return r.json()["candidates"][0]["content"]["parts"][0]["text"], True
+                return f"Error {r.status_code}", False
+            except Exception as e: return self._llm_failed(f"Net Error: {e}")
+        return "Unknown Backend", False
\ No newline at end of file
@@ -1,21 +1,38 @@
 import os
+import re
+import heapq
+import queue
 import threading
 import logging
 import time
-from pygame import mixer
+import wave
+import tempfile
+import importlib.util
+from io import BytesIO
+from collections import deque
+import numpy as np
+from pygame import mixer, sndarray
 from gtts import gTTS
+from model_manager import ModelManager, LOADING
+from tts_cache import TTSCache
 
 LOGGER = logging.getLogger(__name__)
 
-# Спроба імпорту Torch
-HAS_TORCH = False
-try:
-    import torch
-    import torchaudio
-    HAS_TORCH = True
-except (ImportError, OSError) as e:
-    LOGGER.warning(f"Silero/Torch недоступні: {e}")
-    HAS_TORCH = False
+# Torch імпортується ліниво у фоновому завантажувачі (імпорт займає секунди)
+torch = None
+torchaudio = None
+HAS_TORCH = importlib.util.find_spec("torch") is not None
+
+def _import_torch():
+    global torch, torchaudio, HAS_TORCH
+    try:
+        import torch as _torch
+        import torchaudio as _torchaudio
+        torch, torchaudio = _torch, _torchaudio
+    except (ImportError, OSError) as e:
+        LOGGER.warning(f"Silero/Torch недоступні: {e}")
+        HAS_TORCH = False
+        raise
 
 # Спроба імпорту Scipy (резервний метод збереження)
 try:
@@ -24,131 +41,617 @@ try:
 except ImportError:
     HAS_SCIPY = False
 
+# Потокове відтворення (streaming TTS)
+try: import sounddevice as sd
+except (ImportError, OSError): sd = None
+
+SILERO_SPEAKER = 'mykyta' # 'mykyta' або 'lada'
+SILERO_RATE = 48000
+GTTS_LANG = "uk"
+
+# Speech queue priorities (lower is spoken first)
+PRIORITY_ALERT = 0    # timer expiry etc.; survives barge-in
+PRIORITY_REPLY = 1    # command acknowledgements
+PRIORITY_CHATTER = 2  # LLM answers
+
+
+def to_pcm16(audio):
+    """float32 [-1, 1] -> int16 bytes (the cache stores half the size of float32)."""
+    return (np.clip(audio, -1.0, 1.0) * 32767).astype(np.int16).tobytes()
+
+
+def from_pcm16(payload):
+    return np.frombuffer(payload, dtype=np.int16).astype(np.float32) / 32767
+
+
+def split_sentences(text, max_chars=200, first_max_chars=80):
+    """
+    Splits text into speakable chunks: sentences, long ones cut at commas.
+    The first chunk is kept short so the first audio starts sooner.
+    """
+    parts = [p.strip() for p in re.split(r'(?<=[.!?…;:])\s+|\n+', text) if p.strip()]
+    chunks = []
+    for p in parts:
+        limit = first_max_chars if not chunks else max_chars
+        while len(p) > limit:
+            cut = p.rfind(",", 0, limit)
+            if cut <= 0: cut = p.rfind(" ", 0, limit)
+            if cut <= 0: cut = limit
+            chunks.append(p[:cut + 1].strip())
+            p = p[cut + 1:].strip()
+            limit = max_chars
+        if p:
+            # Glue very short fragments ("Так.") to the previous chunk
+            if chunks and len(p) < 20 and len(chunks[-1]) + len(p) < max_chars: chunks[-1] += " " + p
+            else: chunks.append(p)
+    return chunks
+
+
+def load_silero(path="", quantize=False, threads=0):
+    """
+    Loads the Silero TTS model on CPU.
+    path: a pinned torch.package file (e.g. v4_ua.pt), read with no network access.
+    Without a path the torch.hub cache is used (offline when already cached).
+    quantize: dynamic int8 quantization of Linear layers (smaller, often faster on CPU).
+    threads: torch intra-op threads; keeps Silero from taking every core from Vosk/UI.
+    """
+    LOGGER.info("Ініціалізація Silero TTS...")
+    try:
+        _import_torch()
+        if threads: torch.set_num_threads(threads)
+        device = torch.device('cpu')
+        if path:
+            if not os.path.exists(path): raise FileNotFoundError(f"Silero model not found: {path}")
+            from torch.package import PackageImporter
+            model = PackageImporter(path).load_pickle("tts_models", "model")
+        else:
+            # Hub repo already on disk: load it as a local dir (no GitHub check)
+            repo = os.path.join(torch.hub.get_dir(), "snakers4_silero-models_master")
+            source = "local" if os.path.isdir(repo) else "github"
+            model, _ = torch.hub.load(repo_or_dir=repo if source == "local" else 'snakers4/silero-models',
+                                      model='silero_tts',
+                                      language='ua',
+                                      speaker='v4_ua',
+                                      source=source)
+        model.to(device)
+        if quantize: model, quantize = quantize_silero(model)
+    except Exception as e:
+        LOGGER.error(f"Silero Init Failed: {e}")
+        global HAS_TORCH
+        HAS_TORCH = False
+        raise
+    LOGGER.info(f"Silero TTS успішно завантажено (threads={torch.get_num_threads()}, int8={quantize}).")
+    return model
+
+
+def silero_model_id(path="", quantized=False):
+    """Names the loaded Silero variant for TTS cache keys: file (with size and mtime) or hub model, plus int8."""
+    base = "hub:v4_ua"
+    if path:
+        try:
+            st = os.stat(path)
+            base = f"{os.path.abspath(path)}:{st.st_size}:{int(st.st_mtime)}"
+        except OSError:
+            base = os.path.abspath(path)
+    return f"{base}:{'int8' if quantized else 'fp32'}"
+
+
+def quantize_silero(model):
+    """(model, applied). The package wraps its network in .model; TorchScript parts cannot be quantized."""
+    target = getattr(model, "model", model)
+    try:
+        quantized = torch.quantization.quantize_dynamic(target, {torch.nn.Linear}, dtype=torch.qint8)
+    except Exception as e:
+        LOGGER.warning(f"Silero int8 quantization unavailable ({e}), using fp32")
+        return model, False
+    if target is model: return quantized, True
+    model.model = quantized
+    return model, True
+
+
+def silero_synth(model, text):
+    with torch.inference_mode():
+        return model.apply_tts(
+            text=text,
+            speaker=SILERO_SPEAKER,
+            sample_rate=SILERO_RATE,
+            put_accent=True,
+            put_yo=True
+        )
+
+
+class PcmPlayer:
+    """
+    One-shot in-memory playback through sounddevice. Completion is signalled
+    by the stream's finished callback (an Event), not by polling.
+    """
+    def __init__(self):
+        self.stream = None
+
+    def play(self, audio, rate):
+        audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+        done = threading.Event()
+        pos = 0
+
+        def callback(outdata, frames, time_info, status):
+            nonlocal pos
+            chunk = audio[pos:pos + frames]
+            outdata[:len(chunk), 0] = chunk
+            pos += frames
+            if len(chunk) < frames:
+                outdata[len(chunk):, 0] = 0
+                raise sd.CallbackStop
+
+        self.stream = sd.OutputStream(samplerate=rate, channels=1, dtype='float32',
+                                      callback=callback, finished_callback=done.set)
+        try:
+            self.stream.start()
+            # Guard against a device that never reports completion
+            done.wait(timeout=len(audio) / rate + 5)
+        finally:
+            self.stream.close()
+            self.stream = None
+
+    def stop(self):
+        stream = self.stream
+        if stream: stream.abort()
+
+
+class StreamPlayer:
+    """Gapless PCM output: chunks written back to back into one sounddevice stream."""
+    def __init__(self, samplerate):
+        self.stream = sd.OutputStream(samplerate=samplerate, channels=1, dtype='float32')
+        self.aborted = False
+
+    def __enter__(self):
+        self.stream.start()
+        return self
+
+    def write(self, audio):
+        # Blocks until the chunk is handed to PortAudio: natural back-pressure
+        self.stream.write(audio.reshape(-1, 1))
+
+    def abort(self):
+        """Any thread: stops output at once, dropping what is buffered; a blocked write() returns."""
+        self.aborted = True
+        self.stream.abort()
+
+    def __exit__(self, *exc):
+        if not self.aborted: self.stream.stop()  # drains what is still buffered
+        self.stream.close()
+
+
+class SpeechItem:
+    __slots__ = ("priority", "seq", "text", "key", "group", "queued_at")
+
+    def __init__(self, priority, seq, text, key, group=None):
+        self.priority, self.seq, self.text, self.key, self.group = priority, seq, text, key, group
+        self.queued_at = time.perf_counter()
+
+    def __lt__(self, other):
+        return (self.priority, self.seq) < (other.priority, other.seq)
+
+
 class TTSEngine:
     def __init__(self, config):
         self.cfg = config
         try: mixer.init()
         except: pass
         self.lock = threading.Lock()
-        self.silero_model = None
-        self.silero_device = None
+        self.models = ModelManager()
+        self.player = PcmPlayer() if sd else None
+        self.cache = TTSCache(memory_mb=self.cfg.get("tts_cache_memory_mb", 32),
+                              disk_mb=self.cfg.get("tts_cache_disk_mb", 200)) if self.cfg.get("tts_cache", True) else None
+
+        # One worker drains a bounded priority queue; see speak()/cancel()
+        self.cond = threading.Condition()
+        self.pending = []  # heap of SpeechItem
+        self.max_pending = self.cfg.get("tts_queue_size", 8)
+        self.current = None
+        self.cancelled = threading.Event()
+        self.stream_player = None  # StreamPlayer of the utterance being streamed, for cancel()
+        self.seq = 0
+        self.worker = None
+        self.waits_ms = deque(maxlen=200)
+        self.counters = {"spoken": 0, "coalesced": 0, "superseded": 0, "dropped": 0, "cancelled": 0}
 
-        # Preload Silero if selected
+        # Preload Silero in the background if selected
+        self.silero_options = self._silero_options()
+        self.silero_id = ""  # variant of the loaded model, part of the cache key (see _load_silero)
         if self.cfg.get("tts_engine") == "silero" and HAS_TORCH:
             self._init_silero()
 
+    @property
+    def silero_model(self):
+        return self.models.get("silero")
+
     def _init_silero(self):
-        if self.silero_model: return
-        LOGGER.info("Ініціалізація Silero TTS...")
-        try:
-            self.silero_device = torch.device('cpu')
-            # Завантажуємо модель (вона вже має бути в кеші після вашого тесту)
-            self.silero_model, _ = torch.hub.load(repo_or_dir='snakers4/silero-models',
-                                                  model='silero_tts',
-                                                  language='ua',
-                                                  speaker='v4_ua')
-            self.silero_model.to(self.silero_device)
-            LOGGER.info("Silero TTS успішно завантажено.")
-        except Exception as e:
-            LOGGER.error(f"Silero Init Failed: {e}")
-            global HAS_TORCH
-            HAS_TORCH = False
+        """Schedules the Silero load; speech degrades to gTTS until it is ready."""
+        self.models.load("silero", self._load_silero, idle_s=self.cfg.get("silero_idle_unload_s", 0))
 
-    def speak(self, text):
+    def _silero_options(self):
+        return (self.cfg.get("silero_model_path", ""), self.cfg.get("silero_quantize", False),
+                self.cfg.get("torch_threads", 2))
+
+    def apply_settings(self):
+        """
+        Applies changed TTS settings in place: the worker, the cache and a
+        still-valid Silero model are kept; Silero is released when another
+        engine is selected or its load options changed.
+        """
+        self.max_pending = self.cfg.get("tts_queue_size", 8)
+        options = self._silero_options()
+        if self.cfg.get("tts_engine") != "silero" or options != self.silero_options:
+            self.models.unload("silero")
+        self.silero_options = options
+        if self.cfg.get("tts_engine") == "silero" and HAS_TORCH:
+            self._init_silero()
+
+    def _load_silero(self):
+        path = self.cfg.get("silero_model_path", "")
+        model = load_silero(path, threads=self.cfg.get("torch_threads", 2))
+        # Quantized here rather than in load_silero: the cache key needs to know whether it applied
+        quantized = False
+        if self.cfg.get("silero_quantize", False): model, quantized = quantize_silero(model)
+        self.silero_id = silero_model_id(path, quantized)
+        LOGGER.info(f"Silero variant: {self.silero_id}")
+        return model
+
+    # --- Speech queue ---
+    def speak(self, text, priority=PRIORITY_REPLY, key=None, group=None):
+        """
+        Queues text for the TTS worker. A text already waiting is not queued
+        twice; a message with the same `key` replaces the waiting one
+        (e.g. "timer started" superseded by "timer stopped").
+        `group` marks consecutive chunks of one streamed answer: they are
+        never coalesced or dropped and do not count against tts_queue_size,
+        so a long answer is read out whole (barge-in still cancels them).
+        """
         if not text: return
-        threading.Thread(target=self._speak_thread, args=(text,), daemon=True).start()
+        with self.cond:
+            if not group and any(it.text == text and not it.group for it in self.pending):
+                self.counters["coalesced"] += 1
+                return
+            if key and any(it.key == key for it in self.pending):
+                self.counters["superseded"] += 1
+                self._drop_pending(lambda it: it.key == key)
+            item = SpeechItem(priority, self.seq, text, key, group)
+            self.seq += 1
+            droppable = [it for it in self.pending if not it.group]
+            if not group and len(droppable) >= self.max_pending:
+                # Full: the least urgent, most recent message loses
+                worst = max(droppable)
+                self.counters["dropped"] += 1
+                if item > worst:
+                    LOGGER.warning(f"TTS queue full, dropped: {text[:40]}")
+                    return
+                self._drop_pending(lambda it: it is worst)
+            heapq.heappush(self.pending, item)
+            if not self.worker:
+                self.worker = threading.Thread(target=self._worker, daemon=True, name="tts-worker")
+                self.worker.start()
+            self.cond.notify()
+
+    def cancel(self, drop_alerts=False):
+        """
+        Barge-in: drops queued speech and interrupts the current utterance.
+        Alerts survive unless drop_alerts is set.
+        """
+        with self.cond:
+            keep = (lambda it: it.priority == PRIORITY_ALERT) if not drop_alerts else (lambda it: False)
+            before = len(self.pending)
+            self._drop_pending(lambda it: not keep(it))
+            self.counters["cancelled"] += before - len(self.pending)
+            current = self.current
+            if not current or keep(current): return
+            self.counters["cancelled"] += 1
+            self.cancelled.set()
+            stream_player = self.stream_player
+        if stream_player: stream_player.abort()
+        if self.player: self.player.stop()
+        try: mixer.stop()
+        except Exception: pass
 
-    def _speak_thread(self, text):
+    def is_speaking(self):
+        return self.current is not None
+
+    def queue_stats(self):
+        with self.cond:
+            waits = sorted(self.waits_ms)
+            stats = dict(self.counters, queue_depth=len(self.pending), speaking=self.current is not None)
+        if waits:
+            stats["wait_p50_ms"] = round(waits[len(waits) // 2], 1)
+            stats["wait_p95_ms"] = round(waits[min(len(waits) - 1, int(len(waits) * 0.95))], 1)
+            stats["wait_max_ms"] = round(waits[-1], 1)
+        return stats
+
+    def _drop_pending(self, predicate):
+        self.pending = [it for it in self.pending if not predicate(it)]
+        heapq.heapify(self.pending)
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                while not self.pending: self.cond.wait()
+                item = heapq.heappop(self.pending)
+                self.current = item
+                self.cancelled.clear()
+                self.waits_ms.append((time.perf_counter() - item.queued_at) * 1000)
+                self.counters["spoken"] += 1
+                spoken = self.counters["spoken"]
+            try:
+                self._speak_now(item.text)
+            except Exception as e:
+                LOGGER.error(f"TTS worker error: {e}")
+            with self.cond:
+                self.current = None
+            if spoken % 50 == 0: LOGGER.info(f"TTS queue: {self.queue_stats()}")
+
+    def _silero_synth(self, model, text):
+        return silero_synth(model, text)
+
+    # --- Cached synthesis ---
+    def _silero_audio(self, model, text):
+        """float32 PCM at SILERO_RATE, from the cache when this text was spoken before."""
+        key = self._cache_key("silero", text)
+        hit = self.cache.get(key) if self.cache else None
+        if hit: return from_pcm16(hit[2])
+        return self._silero_render(model, text, key)
+
+    def _cache_key(self, engine, text):
+        if engine == "silero": return TTSCache.key("silero", SILERO_SPEAKER, SILERO_RATE, text, model=self.silero_id)
+        return TTSCache.key("gtts", GTTS_LANG, 0, text)
+
+    def _silero_render(self, model, text, key):
+        audio = self._silero_synth(model, text).squeeze().numpy()
+        if self.cache: self.cache.put(key, "pcm16", SILERO_RATE, to_pcm16(audio))
+        return audio
+
+    def _gtts_mp3(self, text):
+        key = self._cache_key("gtts", text)
+        hit = self.cache.get(key) if self.cache else None
+        if hit: return hit[2]
+        return self._gtts_render(text, key)
+
+    def _gtts_render(self, text, key):
+        fp = BytesIO()
+        gTTS(text, lang=GTTS_LANG).write_to_fp(fp)
+        data = fp.getvalue()
+        if self.cache: self.cache.put(key, "mp3", 0, data)
+        return data
+
+    def prerender(self, phrases, delay=5.0):
+        """
+        Synthesizes canned replies into the cache in the background, after the
+        model is ready and startup has settled, so their first use is instant.
+        """
+        if not self.cache: return
+        threading.Thread(target=self._prerender, args=(list(phrases), delay),
+                         daemon=True, name="tts-prerender").start()
+
+    def _prerender(self, phrases, delay):
+        engine = self.cfg.get("tts_engine", "gtts")
+        model = None
+        if engine == "silero":
+            model = self.models.get("silero", timeout=600) if HAS_TORCH else None
+            if not model: return
+        elif engine != "gtts":
+            return
+        time.sleep(delay)
+        rendered = 0
+        for text in dict.fromkeys(phrases):
+            if self.cfg.get("tts_engine", "gtts") != engine: return
+            key = self._cache_key(engine, text)
+            if self.cache.contains(key): continue
+            # One phrase per lock hold: real speech waits at most one short synthesis
+            with self.lock:
+                try:
+                    if model: self._silero_render(model, text, key)
+                    else: self._gtts_render(text, key)
+                    rendered += 1
+                except Exception as e:
+                    LOGGER.warning(f"TTS prerender failed: {e}")
+                    return
+        LOGGER.info(f"TTS prerender: {rendered} new phrases; cache {self.cache.stats()}")
+
+    def _speak_streaming(self, model, text):
+        """
+        Sentence pipeline: chunk N+1 is synthesized while chunk N plays,
+        so the first audio comes after one sentence, not the whole answer.
+        """
+        t0 = time.perf_counter()
+        chunks = split_sentences(text)
+        ready = queue.Queue(maxsize=2)
+        stop = threading.Event()
+
+        def producer():
+            try:
+                for chunk in chunks:
+                    if stop.is_set() or self.cancelled.is_set(): break
+                    ready.put(self._silero_audio(model, chunk))
+            except Exception as e:
+                LOGGER.error(f"Streaming synth error: {e}")
+            if not stop.is_set(): ready.put(None)
+
+        worker = threading.Thread(target=producer, daemon=True, name="tts-synth")
+        worker.start()
+        first = True
+        try:
+            with StreamPlayer(SILERO_RATE) as player:
+                with self.cond: self.stream_player = player
+                if self.cancelled.is_set(): player.abort()  # cancel() came before the registration
+                while not player.aborted:
+                    audio = ready.get()
+                    if audio is None or player.aborted: break
+                    if first:
+                        LOGGER.info(f"TTS first audio after {time.perf_counter() - t0:.2f}s ({len(chunks)} chunks)")
+                        first = False
+                    try: player.write(audio)
+                    except Exception:
+                        if player.aborted: break  # cancel() aborted the stream under a blocked write
+                        raise
+        finally:
+            with self.cond: self.stream_player = None
+            # Once stop is set the producer puts at most one more chunk, which fits
+            # in the emptied queue, so it cannot stay blocked
+            stop.set()
+            while True:
+                try: ready.get_nowait()
+                except queue.Empty: break
+            worker.join()
+
+    def _speak_now(self, text):
         engine_type = self.cfg.get("tts_engine", "gtts")
+        # In-memory playback via sounddevice; "file" keeps the old temp-file path
+        memory = self.player is not None and self.cfg.get("tts_playback", "memory") == "memory"
         
         with self.lock:
-            filename = "out.wav"
-            # Очистка попереднього файлу
-            if os.path.exists(filename):
-                try: os.remove(filename)
-                except: pass
-
             try:
                 # --- SILERO ---
                 if engine_type == "silero" and HAS_TORCH:
-                    if not self.silero_model: self._init_silero()
-                    
-                    if self.silero_model:
-                        # Генеруємо тензор аудіо
-                        audio_tensor = self.silero_model.apply_tts(
-                            text=text,
-                            speaker='mykyta', # 'mykyta' або 'lada'
-                            sample_rate=48000,
-                            put_accent=True,
-                            put_yo=True
-                        )
-
-                        # СПРОБА 1: Torchaudio (стандарт)
-                        saved = False
+                    silero_model = self.silero_model
+                    if not silero_model:
+                        # Not ready yet: keep loading in the background, answer with gTTS now
+                        if self.models.state("silero") != LOADING: self._init_silero()
+                        LOGGER.info("Silero ще завантажується, використовую gTTS.")
+                        self._play_gtts(text, memory)
+                        return
+
+                    if memory and self.cfg.get("tts_streaming", False):
                         try:
-                            # Явно вказуємо backend, якщо soundfile встановлено
-                            if os.name == 'nt': # Windows fix
-                                import soundfile # Перевірка наявності
-                                torchaudio.set_audio_backend("soundfile")
-                            
-                            torchaudio.save(filename, audio_tensor.unsqueeze(0), 48000)
-                            saved = True
+                            self._speak_streaming(silero_model, text)
+                            return
                         except Exception as e:
-                            LOGGER.warning(f"Torchaudio save failed ({e}), trying Scipy...")
-
-                        # СПРОБА 2: Scipy (Резерв)
-                        if not saved and HAS_SCIPY:
-                            try:
-                                audio_np = audio_tensor.squeeze().numpy()
-                                scipy.io.wavfile.write(filename, 48000, audio_np)
-                                saved = True
-                            except Exception as e:
-                                LOGGER.error(f"Scipy save failed: {e}")
+                            LOGGER.error(f"Streaming TTS failed ({e}), falling back to whole-text playback")
 
-                        if not saved:
-                            raise RuntimeError("Не вдалося зберегти файл жодним методом.")
-
-                    else:
-                        # Fallback
-                        self._gtts_speak(text, "out.mp3")
-                        filename = "out.mp3"
+                    # Генеруємо аудіо (або беремо з кешу)
+                    audio = self._silero_audio(silero_model, text)
+                    if memory and self._play_memory(audio, SILERO_RATE): return
+                    filename = self._temp_path(".wav")
+                    self._save_silero_wav(filename, audio)
+                    self._play_file(filename)
 
                 # --- PYTTSX3 ---
                 elif engine_type == "pyttsx3":
                     import pyttsx3
+                    filename = self._temp_path(".wav")
                     engine = pyttsx3.init()
                     engine.save_to_file(text, filename)
                     engine.runAndWait()
+                    pcm = self._read_wav(filename) if memory else None
+                    if pcm and self._play_memory(*pcm):
+                        self._remove(filename)
+                    else:
+                        self._play_file(filename)
                 
                 # --- GTTS (Default) ---
                 else: 
-                    filename = "out.mp3"
-                    self._gtts_speak(text, filename)
-
-                # --- PLAYBACK ---
-                if os.path.exists(filename):
-                    mixer.music.load(filename)
-                    mixer.music.play()
-                    while mixer.music.get_busy():
-                        time.sleep(0.1)
-                    mixer.music.unload()
-                    try: os.remove(filename)
-                    except: pass
-                else:
-                    LOGGER.error("Файл аудіо не створено.")
+                    self._play_gtts(text, memory)
                 
             except Exception as e:
                 LOGGER.error(f"TTS Error ({engine_type}): {e}")
                 # Остання надія - gTTS
                 if engine_type == "silero":
-                    try:
-                        self._gtts_speak(text, "fallback.mp3")
-                        mixer.music.load("fallback.mp3")
-                        mixer.music.play()
-                        while mixer.music.get_busy(): time.sleep(0.1)
-                        mixer.music.unload()
+                    try: self._play_gtts(text, memory)
                     except: pass
 
-    def _gtts_speak(self, text, filename):
-        tts = gTTS(text, lang="uk")
-        tts.save(filename)
\ No newline at end of file
+    # --- Playback helpers ---
+    def _play_memory(self, audio, rate):
+        """Plays PCM from memory; False if the device path failed (caller uses a file)."""
+        if self.cancelled.is_set(): return True
+        try:
+            self.player.play(audio, rate)
+            return True
+        except Exception as e:
+            LOGGER.warning(f"In-memory playback failed ({e}), using file playback")
+            return False
+
+    def _play_gtts(self, text, memory):
+        data = self._gtts_mp3(text)
+        if self.cancelled.is_set(): return
+        if memory:
+            # Decoded in memory and played like Silero PCM: completion and cancel() are events
+            audio, rate = self._decode_mp3(data)
+            if audio is not None and self._play_memory(audio, rate): return
+        filename = self._temp_path(".mp3")
+        with open(filename, "wb") as f: f.write(data)
+        self._play_file(filename)
+
+    def _play_file(self, filename):
+        if not os.path.exists(filename):
+            LOGGER.error("Файл аудіо не створено.")
+            return
+        if self.cancelled.is_set():
+            self._remove(filename)
+            return
+        self._play_mixer(filename)
+        self._remove(filename)
+
+    def _play_mixer(self, filename):
+        # Decoded up front, so its length is known: wait on the cancel event instead of polling get_busy()
+        sound = mixer.Sound(filename)
+        sound.play()
+        self.cancelled.wait(sound.get_length())
+        sound.stop()
+
+    @staticmethod
+    def _decode_mp3(data):
+        """mp3 bytes -> (mono float32 PCM, rate) with the mixer's decoder; (None, 0) if it cannot."""
+        try:
+            rate = mixer.get_init()[0]
+            pcm = sndarray.array(mixer.Sound(file=BytesIO(data)))
+        except Exception as e:
+            LOGGER.warning(f"mp3 decode failed ({e}), using file playback")
+            return None, 0
+        scale = np.iinfo(pcm.dtype).max + 1 if np.issubdtype(pcm.dtype, np.integer) else 1
+        pcm = pcm.reshape(len(pcm), -1).mean(axis=1) / scale  # the mixer may be stereo
+        return pcm.astype(np.float32), rate
+
+    def _save_silero_wav(self, filename, audio):
+        # СПРОБА 1: Torchaudio (стандарт)
+        try:
+            # Явно вказуємо backend, якщо soundfile встановлено
+            if os.name == 'nt': # Windows fix
+                import soundfile # Перевірка наявності
+                torchaudio.set_audio_backend("soundfile")
+            
+            torchaudio.save(filename, torch.from_numpy(audio).unsqueeze(0), SILERO_RATE)
+            return
+        except Exception as e:
+            LOGGER.warning(f"Torchaudio save failed ({e}), trying Scipy...")
+
+        # СПРОБА 2: Scipy (Резерв)
+        if HAS_SCIPY:
+            try:
+                scipy.io.wavfile.write(filename, SILERO_RATE, audio)
+                return
+            except Exception as e:
+                LOGGER.error(f"Scipy save failed: {e}")
+
+        raise RuntimeError("Не вдалося зберегти файл жодним методом.")
+
+    @staticmethod
+    def _read_wav(filename):
+        """16-bit WAV -> (float32 mono, rate), or None if it cannot be decoded."""
+        try:
+            with wave.open(filename, "rb") as wf:
+                if wf.getsampwidth() != 2: return None
+                rate, channels = wf.getframerate(), wf.getnchannels()
+                pcm = np.frombuffer(wf.readframes(wf.getnframes()), dtype=np.int16)
+            audio = pcm.reshape(-1, channels).mean(axis=1) / 32768.0
+            return audio.astype(np.float32), rate
+        except Exception as e:
+            LOGGER.warning(f"WAV decode failed: {e}")
+            return None
+
+    @staticmethod
+    def _temp_path(suffix):
+        # Unique per call: several processes may share the working directory
+        fd, path = tempfile.mkstemp(prefix="petro_tts_", suffix=suffix)
+        os.close(fd)
+        return path
+
+    @staticmethod
+    def _remove(filename):
+        try: os.remove(filename)
+        except: pass
\ No newline at end of file
@@ -0,0 +1,128 @@
+"""
+Benchmark for the vision screenshot path (screen_capture.ScreenCapture).
+
+Feeds synthetic 1920x1080 "desktop" frames through the pipeline, so no
+display is needed, and compares it with the old per-call path (thumbnail,
+JPEG quality 80, base64 on every request). Scenarios:
+    static  - nothing changes between requests
+    cursor  - only a small cursor-sized square moves
+    scroll  - the whole content shifts every frame
+    noisy   - a video-like region fills with random pixels every frame
+
+    python bench_capture.py --frames 30 --target-kb 150 --output capture.json
+"""
+import json
+import time
+import base64
+import random
+import argparse
+import platform
+from io import BytesIO
+
+from PIL import Image, ImageDraw
+from screen_capture import ScreenCapture
+
+WIDTH, HEIGHT = 1920, 1080
+
+
+def make_desktop(rng):
+    """Window-like panels with lines of "text", roughly what a real screen compresses like."""
+    img = Image.new("RGB", (WIDTH, HEIGHT), (32, 36, 44))
+    draw = ImageDraw.Draw(img)
+    for _ in range(6):
+        x, y = rng.randint(0, WIDTH - 500), rng.randint(0, HEIGHT - 400)
+        w, h = rng.randint(400, 900), rng.randint(300, 600)
+        draw.rectangle([x, y, x + w, y + h], fill=(240, 240, 240), outline=(90, 90, 90))
+        draw.rectangle([x, y, x + w, y + 28], fill=(60, 110, 200))
+        for ty in range(y + 40, y + h - 14, 18):
+            tx = x + 12
+            while tx < x + w - 40:
+                word = rng.randint(12, 60)
+                draw.rectangle([tx, ty, tx + word, ty + 9], fill=(rng.randint(0, 80),) * 3)
+                tx += word + 8
+    return img
+
+
+class SyntheticSource:
+    """Frame source for ScreenCapture: returns the next frame of a scenario."""
+    def __init__(self, scenario, seed=42):
+        self.scenario = scenario
+        self.rng = random.Random(seed)
+        self.base = make_desktop(self.rng)
+        self.n = 0
+
+    def __call__(self):
+        self.n += 1
+        if self.scenario == "static": return self.base
+        img = self.base.copy()
+        if self.scenario == "cursor":
+            x, y = 400 + 3 * self.n, 300 + 2 * self.n
+            ImageDraw.Draw(img).rectangle([x, y, x + 12, y + 18], fill=(255, 255, 255), outline=(0, 0, 0))
+        elif self.scenario == "scroll":
+            shift = (self.n * 18) % HEIGHT
+            img.paste(self.base.crop((0, shift, WIDTH, HEIGHT)), (0, 0))
+            img.paste(self.base.crop((0, 0, WIDTH, shift)), (0, HEIGHT - shift))
+        elif self.scenario == "noisy":
+            noise = Image.frombytes("RGB", (640, 360), self.rng.randbytes(640 * 360 * 3))
+            img.paste(noise, (1100, 600))
+        return img
+
+
+def legacy_grab(source):
+    """The old SystemIO.get_screenshot_base64 body, for comparison."""
+    img = source()
+    img = img.copy()  # thumbnail() works in place; keep the synthetic base frame intact
+    img.thumbnail((1024, 1024))
+    img = img.convert("RGB")
+    buffered = BytesIO()
+    img.save(buffered, format="JPEG", quality=80)
+    return base64.b64encode(buffered.getvalue()).decode("utf-8")
+
+
+def percentiles(samples_ms):
+    s = sorted(samples_ms)
+    def pct(p): return round(s[min(len(s) - 1, int(len(s) * p / 100))], 2)
+    return {"p50_ms": pct(50), "p95_ms": pct(95), "mean_ms": round(sum(s) / len(s), 2)}
+
+
+def run(grab, frames):
+    times, sizes = [], []
+    for _ in range(frames):
+        t0 = time.perf_counter()
+        b64 = grab()
+        times.append((time.perf_counter() - t0) * 1000)
+        sizes.append(len(b64))
+    return dict(percentiles(times), payload_bytes_mean=round(sum(sizes) / len(sizes)))
+
+
+def run_scenario(scenario, frames, target_bytes, seed):
+    legacy = run(lambda src=SyntheticSource(scenario, seed): legacy_grab(src), frames)
+    cap = ScreenCapture(source=SyntheticSource(scenario, seed), target_bytes=target_bytes, report_every=10 ** 9)
+    pipeline = run(cap.grab_base64, frames)
+    stats = cap.stats()
+    pipeline.update({k: v for k, v in stats.items() if k.endswith("_p50_ms")})
+    pipeline.update(reused=stats["reused"], encodes=stats["encodes"], last=stats["last"])
+    return {"legacy": legacy, "pipeline": pipeline}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark screenshot capture/encode for vision queries")
+    ap.add_argument("--frames", type=int, default=30, help="requests per scenario")
+    ap.add_argument("--target-kb", type=int, default=200, help="JPEG byte budget")
+    ap.add_argument("--scenarios", nargs="+", default=["static", "cursor", "scroll", "noisy"])
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--output", help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    report = {"machine": platform.platform(), "frames": args.frames, "target_kb": args.target_kb, "scenarios": {}}
+    for scenario in args.scenarios:
+        report["scenarios"][scenario] = run_scenario(scenario, args.frames, args.target_kb * 1024, args.seed)
+    text = json.dumps(report, ensure_ascii=False, indent=2)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(text)
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
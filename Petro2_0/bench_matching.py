@@ -0,0 +1,212 @@
+"""
+Benchmark for the intent-matching path (FastCommandMatcher + CommandExecutor).
+
+Generates synthetic petro_config.json payloads of growing size, a corpus of
+Ukrainian utterances (hits, misheard hits and misses) and reports latency
+percentiles and throughput as JSON. SystemIO is replaced by a stub module, so
+nothing is launched and no display is needed.
+
+    python bench_matching.py --sizes 10 1000 10000 --output bench.json
+"""
+import os
+import sys
+import json
+import time
+import types
+import random
+import argparse
+import platform
+import tempfile
+import statistics
+
+import config
+
+SYLLABLES = ["ка", "ро", "ми", "ле", "то", "на", "ві", "гу", "ся", "пе", "ди", "жо", "бу", "ці", "ша", "ре", "ло", "зі"]
+CHATTER = [
+    "розкажи анекдот про котів",
+    "яка погода буде завтра у києві",
+    "хто написав кобзар",
+    "скільки буде два плюс два",
+    "порадь фільм на вечір",
+    "як справи петро",
+    "поясни що таке нейронна мережа",
+    "привіт",
+]
+FIXED = ["таймер 5 хв", "стоп таймер", "згорни вікна", "покажи робочий стіл", "статистика системи", "що на екрані"]
+
+
+class StubSystemIO:
+    """Side-effect free stand-in for system_io.SystemIO."""
+    def __init__(self): self.calls = 0
+    def _ok(self, *args, **kwargs):
+        self.calls += 1
+        return "OK"
+    open_entry = close_app = run_workspace = run_iot_action = window_action = get_system_stats = _ok
+
+
+def install_stub_system_io():
+    # Must run before command_executor is imported (pyautogui needs a display)
+    mod = types.ModuleType("system_io")
+    mod.SystemIO = StubSystemIO
+    sys.modules["system_io"] = mod
+
+
+def make_word(rng, used):
+    while True:
+        w = "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4)))
+        if w not in used:
+            used.add(w)
+            return w
+
+
+def make_payload(n_entries, rng):
+    used = set()
+    entries = [{
+        "id": f"e{i}",
+        "name": f"Entry {i}",
+        "voice_phrases": [make_word(rng, used) for _ in range(rng.randint(1, 3))],
+        "type": rng.choice(["app", "app", "website", "folder"]),
+        "path": ""
+    } for i in range(n_entries)]
+    workspaces = [{
+        "id": f"w{i}",
+        "name": f"Workspace {i}",
+        "voice_phrases": [f"режим {make_word(rng, used)}"],
+        "steps": []
+    } for i in range(max(1, n_entries // 10))]
+    devices = [{
+        "id": f"d{i}",
+        "display_name": f"Device {i}",
+        "connection_type": "HTTP",
+        "connection_params": {"url": "http://127.0.0.1", "method": "GET"},
+        "actions": [{"name": f"a{j}", "voice_phrases": [f"увімкни {make_word(rng, used)}"], "payload": "v={value}"} for j in range(5)]
+    } for i in range(max(1, n_entries // 50))]
+    return {"llm_backend": "local", "tts_engine": "gtts", "muted": True,
+            "entries": entries, "workspaces": workspaces, "iot_devices": devices}
+
+
+def misspell(word, rng):
+    i = rng.randrange(len(word))
+    return word[:i] + rng.choice("аоеиі") + word[i + 1:]
+
+
+def make_corpus(payload, n, rng):
+    entries, wss, devs = payload["entries"], payload["workspaces"], payload["iot_devices"]
+    corpus = []
+    for _ in range(n):
+        kind = rng.random()
+        if kind < 0.30:
+            corpus.append(f"відкрий {rng.choice(rng.choice(entries)['voice_phrases'])}")
+        elif kind < 0.40:
+            corpus.append(f"закрий {rng.choice(rng.choice(entries)['voice_phrases'])}")
+        elif kind < 0.50:
+            corpus.append(rng.choice(rng.choice(wss)["voice_phrases"]))
+        elif kind < 0.60:
+            act = rng.choice(rng.choice(devs)["actions"])
+            corpus.append(f"{rng.choice(act['voice_phrases'])} {rng.randint(0, 100)}")
+        elif kind < 0.70:
+            corpus.append(rng.choice(FIXED))
+        elif kind < 0.80:
+            corpus.append(f"відкрий {misspell(rng.choice(rng.choice(entries)['voice_phrases']), rng)}")
+        else:
+            corpus.append(rng.choice(CHATTER))
+    return corpus
+
+
+def percentiles(samples_ms):
+    s = sorted(samples_ms)
+    def pct(p): return round(s[min(len(s) - 1, int(len(s) * p / 100))], 4)
+    return {"p50_ms": pct(50), "p95_ms": pct(95), "p99_ms": pct(99),
+            "mean_ms": round(statistics.fmean(s), 4), "max_ms": round(s[-1], 4)}
+
+
+def timed(fn, corpus):
+    samples = []
+    start = time.perf_counter()
+    for text in corpus:
+        t0 = time.perf_counter()
+        fn(text)
+        samples.append((time.perf_counter() - t0) * 1000)
+    total = time.perf_counter() - start
+    res = percentiles(samples)
+    res["throughput_per_s"] = round(len(corpus) / total, 1) if total else None
+    return res
+
+
+def run_size(n_entries, n_utterances, seed, tmpdir):
+    from fast_commands import FastCommandMatcher
+    from command_executor import CommandExecutor
+
+    rng = random.Random(seed)
+    payload = make_payload(n_entries, rng)
+    path = os.path.join(tmpdir, f"petro_config_{n_entries}.json")
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(payload, f, ensure_ascii=False)
+
+    # Point the singleton at the synthetic payload (never saved back)
+    config.CONFIG_FILE = path
+    cfg = config.Config()
+    cfg.load()
+    corpus = make_corpus(payload, n_utterances, rng)
+
+    matcher = FastCommandMatcher()
+    t0 = time.perf_counter()
+    matcher.match("")
+    build_ms = (time.perf_counter() - t0) * 1000
+
+    cfg.data["match_cache_size"] = 0
+    uncached = timed(matcher.match, corpus)
+    cfg.data["match_cache_size"] = 256
+    cfg.version += 1
+    cached = timed(matcher.match, corpus)
+    cache_stats = matcher.cache_stats()
+
+    results = [matcher.match(t) for t in corpus]
+    executor = CommandExecutor(lambda text: None, None)
+    commands = [r for r in results if r]
+    execute = timed(executor.execute, commands) if commands else None
+
+    return {
+        "entries": len(payload["entries"]),
+        "workspaces": len(payload["workspaces"]),
+        "iot_actions": sum(len(d["actions"]) for d in payload["iot_devices"]),
+        "utterances": len(corpus),
+        "hit_ratio": round(len(commands) / len(corpus), 3),
+        "index_build_ms": round(build_ms, 2),
+        "match": uncached,
+        "match_cached": cached,
+        "cache": cache_stats,
+        "execute": execute,
+    }
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark FastCommandMatcher / CommandExecutor")
+    ap.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 10000], help="entry counts to generate")
+    ap.add_argument("--utterances", type=int, default=2000)
+    ap.add_argument("--seed", type=int, default=42)
+    ap.add_argument("--output", help="write JSON here instead of stdout")
+    args = ap.parse_args(argv)
+
+    install_stub_system_io()
+    report = {
+        "benchmark": "intent_matching",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "seed": args.seed,
+        "runs": []
+    }
+    with tempfile.TemporaryDirectory() as tmpdir:
+        for n in args.sizes:
+            report["runs"].append(run_size(n, args.utterances, args.seed, tmpdir))
+
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""
+Benchmark for Silero TTS model variants: fp32 vs dynamic int8, torch thread counts.
+
+Each variant runs in a fresh subprocess, so its RSS is not inflated by the
+variants before it. Reports load time, cold/warm latency, real-time factor
+(synthesis time / audio duration, lower is better) and RSS as JSON.
+
+    python bench_silero.py --model models/v4_ua.pt --threads 1 2 4 --output silero.json
+"""
+import sys
+import json
+import time
+import argparse
+import platform
+import subprocess
+import statistics
+
+TEXTS = [
+    "Таймер зупинено.",
+    "Запускаю браузер.",
+    "Сьогодні у Києві хмарно, до вечора можливий невеликий дощ.",
+    "Я — Петруча, інтелектуальний голосовий асистент. Я вмію керувати комп'ютером та запускати програми.",
+    "Нейронна мережа складається з шарів, кожен з яких перетворює вхідні дані та передає результат далі.",
+]
+
+
+def rss_mb():
+    """(current, peak) resident memory of this process in MB; peak may be None."""
+    try:
+        import psutil
+        info = psutil.Process().memory_info()
+        peak = getattr(info, "peak_wset", None)  # Windows
+        current, peak = info.rss / 2**20, peak / 2**20 if peak else None
+    except ImportError:
+        current, peak = None, None
+    if peak is None:
+        try:
+            import resource
+            peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024  # KB on Linux
+        except ImportError:
+            pass
+    return (round(current, 1) if current else None), (round(peak, 1) if peak else None)
+
+
+def run_variant(path, quantize, threads, repeats):
+    import audio_utils
+    rss_start, _ = rss_mb()
+    t0 = time.perf_counter()
+    model = audio_utils.load_silero(path, threads=threads)
+    applied = False
+    if quantize: model, applied = audio_utils.quantize_silero(model)
+    load_s = time.perf_counter() - t0
+    rss_loaded, _ = rss_mb()
+
+    t0 = time.perf_counter()
+    audio_utils.silero_synth(model, TEXTS[0])
+    cold_ms = (time.perf_counter() - t0) * 1000
+
+    latencies, synth_s, audio_s = [], 0.0, 0.0
+    for _ in range(repeats):
+        for text in TEXTS:
+            t0 = time.perf_counter()
+            audio = audio_utils.silero_synth(model, text)
+            dt = time.perf_counter() - t0
+            latencies.append(dt * 1000)
+            synth_s += dt
+            audio_s += audio.numel() / audio_utils.SILERO_RATE
+    rss_end, rss_peak = rss_mb()
+    return {
+        "int8_requested": quantize,
+        "int8_applied": applied,
+        "threads": threads,
+        "load_s": round(load_s, 2),
+        "cold_ms": round(cold_ms, 1),
+        "warm_p50_ms": round(statistics.median(latencies), 1),
+        "warm_max_ms": round(max(latencies), 1),
+        "rtf": round(synth_s / audio_s, 4) if audio_s else None,
+        "rss_start_mb": rss_start,
+        "rss_loaded_mb": rss_loaded,
+        "rss_end_mb": rss_end,
+        "rss_peak_mb": rss_peak,
+    }
+
+
+def spawn(spec):
+    proc = subprocess.run([sys.executable, __file__, "--worker", json.dumps(spec)],
+                          capture_output=True, text=True, encoding="utf-8")
+    if proc.returncode != 0:
+        return dict(spec, error=(proc.stderr.strip().splitlines() or ["failed"])[-1])
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark Silero TTS variants")
+    ap.add_argument("--model", default="", help="local Silero package (.pt); empty = torch.hub cache")
+    ap.add_argument("--threads", type=int, nargs="+", default=[1, 2, 4])
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--no-int8", action="store_true", help="skip the quantized variants")
+    ap.add_argument("--output", help="write JSON here instead of stdout")
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        spec = json.loads(args.worker)
+        print(json.dumps(run_variant(spec["model"], spec["int8"], spec["threads"], spec["repeats"])))
+        return
+
+    report = {
+        "benchmark": "silero_variants",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "model": args.model or "torch.hub",
+        "runs": []
+    }
+    for threads in args.threads:
+        for int8 in ([False] if args.no_int8 else [False, True]):
+            spec = {"model": args.model, "int8": int8, "threads": threads, "repeats": args.repeats}
+            report["runs"].append(spawn(spec))
+
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
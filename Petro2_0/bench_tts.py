@@ -0,0 +1,184 @@
+"""
+Headless benchmark for the TTSEngine back ends: silero, pyttsx3, gtts.
+
+Synthesizes a fixed Ukrainian corpus (short / medium / long texts) without
+playback and without the TTS cache. Each engine runs in a fresh subprocess,
+so cold start and peak RSS are its own. Reports cold start, warm latency,
+real-time factor (synthesis time / audio duration), peak RSS and output
+bytes as JSON. gtts needs the network and is skipped when offline.
+
+    python bench_tts.py --engines silero pyttsx3 gtts --output tts.json
+"""
+import os
+import sys
+import json
+import time
+import wave
+import atexit
+import socket
+import argparse
+import platform
+import tempfile
+import subprocess
+import statistics
+from io import BytesIO
+
+from bench_silero import rss_mb
+
+CORPUS = {
+    "short": [
+        "Таймер зупинено.",
+        "Час вийшов!",
+        "Запускаю браузер.",
+    ],
+    "medium": [
+        "Сьогодні у Києві хмарно, до вечора можливий невеликий дощ.",
+        "Я знайшов три статті про нейронні мережі, ось коротке резюме першої.",
+    ],
+    "long": [
+        "Я — Петруча, інтелектуальний голосовий асистент. Я вмію керувати комп'ютером, "
+        "запускати програми, шукати інформацію в інтернеті, керувати IoT пристроями "
+        "та аналізувати зображення з екрану. Скажіть, чим я можу допомогти сьогодні?",
+    ],
+}
+ENGINES = ["silero", "pyttsx3", "gtts"]
+GTTS_KBPS = 32  # gTTS returns 32 kbit/s mono mp3; duration is estimated from size
+
+
+# --- Engines: each returns synth(text) -> (audio_seconds, output_bytes) ---
+def make_silero(args):
+    import audio_utils
+    model = audio_utils.load_silero(args.get("silero_model", ""), threads=args.get("threads", 2))
+
+    def synth(text):
+        audio = audio_utils.silero_synth(model, text)
+        return audio.numel() / audio_utils.SILERO_RATE, audio.numel() * 2  # as 16-bit PCM
+    return synth
+
+
+def make_pyttsx3(args):
+    import pyttsx3
+    engine = pyttsx3.init()
+    fd, path = tempfile.mkstemp(prefix="petro_bench_", suffix=".wav")
+    os.close(fd)
+    atexit.register(os.remove, path)
+
+    def synth(text):
+        engine.save_to_file(text, path)
+        engine.runAndWait()
+        with wave.open(path, "rb") as wf:
+            seconds = wf.getnframes() / wf.getframerate()
+        return seconds, os.path.getsize(path)
+    return synth
+
+
+def make_gtts(args):
+    from gtts import gTTS
+
+    def synth(text):
+        fp = BytesIO()
+        gTTS(text, lang="uk").write_to_fp(fp)
+        size = fp.tell()
+        return size * 8 / (GTTS_KBPS * 1000), size
+    return synth
+
+
+FACTORIES = {"silero": make_silero, "pyttsx3": make_pyttsx3, "gtts": make_gtts}
+
+
+def online(host="translate.google.com", timeout=3):
+    try:
+        socket.create_connection((host, 443), timeout=timeout).close()
+        return True
+    except OSError:
+        return False
+
+
+def run_engine(name, args):
+    t0 = time.perf_counter()
+    synth = FACTORIES[name](args)
+    init_s = time.perf_counter() - t0
+    t0 = time.perf_counter()
+    synth(CORPUS["short"][0])
+    first_ms = (time.perf_counter() - t0) * 1000
+
+    classes = {}
+    total_synth, total_audio, total_bytes = 0.0, 0.0, 0
+    for cls, texts in CORPUS.items():
+        latencies, synth_s, audio_s, out_bytes = [], 0.0, 0.0, 0
+        for _ in range(args.get("repeats", 3)):
+            for text in texts:
+                t0 = time.perf_counter()
+                seconds, size = synth(text)
+                dt = time.perf_counter() - t0
+                latencies.append(dt * 1000)
+                synth_s, audio_s, out_bytes = synth_s + dt, audio_s + seconds, out_bytes + size
+        classes[cls] = {
+            "warm_p50_ms": round(statistics.median(latencies), 1),
+            "warm_max_ms": round(max(latencies), 1),
+            "rtf": round(synth_s / audio_s, 4) if audio_s else None,
+            "audio_s": round(audio_s, 2),
+            "output_bytes": out_bytes,
+        }
+        total_synth, total_audio, total_bytes = total_synth + synth_s, total_audio + audio_s, total_bytes + out_bytes
+    _, peak = rss_mb()
+    return {
+        "engine": name,
+        "cold_start_s": round(init_s + first_ms / 1000, 2),
+        "init_s": round(init_s, 2),
+        "first_synth_ms": round(first_ms, 1),
+        "rtf": round(total_synth / total_audio, 4) if total_audio else None,
+        "output_bytes": total_bytes,
+        "rss_peak_mb": peak,
+        "duration_estimated": name == "gtts",
+        "classes": classes,
+    }
+
+
+def spawn(name, args):
+    proc = subprocess.run([sys.executable, __file__, "--worker", name, "--worker-args", json.dumps(args)],
+                          capture_output=True, text=True, encoding="utf-8")
+    if proc.returncode != 0:
+        return {"engine": name, "error": (proc.stderr.strip().splitlines() or ["failed"])[-1]}
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Benchmark TTS engines (no playback)")
+    ap.add_argument("--engines", nargs="+", choices=ENGINES, default=ENGINES)
+    ap.add_argument("--repeats", type=int, default=3)
+    ap.add_argument("--silero-model", default="", help="local Silero package (.pt); empty = torch.hub cache")
+    ap.add_argument("--threads", type=int, default=2, help="torch threads for silero")
+    ap.add_argument("--output", help="write JSON here instead of stdout")
+    ap.add_argument("--worker", help=argparse.SUPPRESS)
+    ap.add_argument("--worker-args", help=argparse.SUPPRESS)
+    args = ap.parse_args(argv)
+
+    if args.worker:
+        print(json.dumps(run_engine(args.worker, json.loads(args.worker_args)), ensure_ascii=False))
+        return
+
+    report = {
+        "benchmark": "tts_engines",
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "corpus": {cls: len(texts) for cls, texts in CORPUS.items()},
+        "runs": []
+    }
+    worker_args = {"repeats": args.repeats, "silero_model": args.silero_model, "threads": args.threads}
+    for name in args.engines:
+        if name == "gtts" and not online():
+            report["runs"].append({"engine": name, "skipped": "offline"})
+            continue
+        report["runs"].append(spawn(name, worker_args))
+
+    out = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        with open(args.output, "w", encoding="utf-8") as f: f.write(out)
+    else:
+        print(out)
+
+
+if __name__ == "__main__":
+    main()
@@ -5,6 +5,17 @@ from system_io import SystemIO
 
 LOGGER = logging.getLogger(__name__)
 
+DEFENSE_CAPABILITIES_TEXT = (
+    "Я — Петруча, інтелектуальний голосовий асистент. "
+    "Я вмію керувати комп'ютером, запускати програми, шукати інформацію в інтернеті, "
+    "керувати IoT пристроями та аналізувати зображення з екрану."
+)
+DEFENSE_ARCHITECTURE_TEXT = (
+    "Моя архітектура складається з модулів розпізнавання мови, "
+    "обробки природної мови на базі LLM, "
+    "системи виконання команд та нейронного синтезу мови."
+)
+
 class CommandExecutor:
     def __init__(self, speak, legacy_execute) -> None:
         self._speak = speak
@@ -19,21 +30,11 @@ class CommandExecutor:
         LOGGER.info(f"Executing: {intent}")
 
         if intent == "DEFENSE_CAPABILITIES":
-            text = (
-                "Я — Петруча, інтелектуальний голосовий асистент. "
-                "Я вмію керувати комп'ютером, запускати програми, шукати інформацію в інтернеті, "
-                "керувати IoT пристроями та аналізувати зображення з екрану."
-            )
-            self._speak(text)
+            self._speak(DEFENSE_CAPABILITIES_TEXT)
             return True
 
         if intent == "DEFENSE_ARCHITECTURE":
-            text = (
-                "Моя архітектура складається з модулів розпізнавання мови, "
-                "обробки природної мови на базі LLM, "
-                "системи виконання команд та нейронного синтезу мови."
-            )
-            self._speak(text)
+            self._speak(DEFENSE_ARCHITECTURE_TEXT)
             return True
 
         if intent == "OPEN_ENTRY": 
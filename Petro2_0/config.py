@@ -19,6 +19,10 @@ class Config:
 
     def load(self):
         self.data = {}
+        # Bumped whenever voice phrases may have changed (matcher index rebuild)
+        self.phrases_version = getattr(self, "phrases_version", 0) + 1
+        # Bumped on every load/save (invalidates derived caches)
+        self.version = getattr(self, "version", 0) + 1
         if os.path.exists(CONFIG_FILE):
             try:
                 with open(CONFIG_FILE, "r", encoding="utf-8") as f:
@@ -30,12 +34,51 @@ class Config:
         defaults = {
             "stt_backend": "vosk",
             "llm_backend": "local",
+            "llm_streaming": False,     # show/speak the answer while it is generated
+            "llm_context_tokens": 3000, # approx. prompt budget: system + history + context
+            "llm_turn_tokens": 400,     # older turns longer than this are clipped in the prompt
+            "llm_cache": False,         # reuse answers to repeated questions
+            "llm_cache_ttl_s": 3600,
+            "llm_cache_size": 128,
+            "llm_cache_sqlite": False,  # also keep cached answers in llm_cache.db
+            "request_workers": 2,       # utterances processed in parallel
+            "request_deadline_s": 30,   # slow stages (search/LLM) give up after this
+            "context_deadline_s": 5,    # max wait for memory/search before asking the LLM
+            "llm_prefix_warmup": False, # local LLM: pre-process the prompt prefix during web search
             "tts_engine": "silero",     # Changed default to silero
+            "tts_streaming": False,     # Silero: speak sentence by sentence while synthesizing
+            "tts_playback": "memory",   # "memory" (sounddevice) or "file" (temp file + pygame)
+            "silero_model_path": "",    # local Silero package (.pt); empty = torch.hub cache
+            "silero_quantize": False,   # dynamic int8 quantization
+            "torch_threads": 2,         # torch intra-op threads (0 = torch default)
+            "silero_idle_unload_s": 0,  # free Silero after this long unused (0 = keep); replies use gTTS while it reloads
+            "vosk_idle_unload_s": 0,    # free Vosk when not listening this long (0 = keep)
+            "model_memory_budget_mb": 0, # cap for all resident models (0 = unlimited)
+            "tts_cache": True,          # reuse synthesized audio (memory LRU + tts_cache/ on disk)
+            "tts_cache_memory_mb": 32,
+            "tts_cache_disk_mb": 200,
+            "tts_queue_size": 8,        # max utterances waiting for the TTS worker
+            "tts_barge_in": False,      # wake word during speech cancels it
             "muted": False,
             "wake_word_enabled": True,
+            "partial_commands": False,  # fire fast commands from Vosk partial results
+            "partial_stable_blocks": 2, # partial must repeat this many blocks (~250 ms each)
+            "command_grammar": False,   # decode with a config-built Vosk grammar first
+            "wake_gate": False,         # keyword-spot the wake word before full decoding
+            "vad_enabled": False,       # skip silent audio blocks before decoding
+            "record_audio_path": "",    # optional WAV dump of the mic stream
+            "screen_max_side": 1024,    # vision screenshots are downscaled to this
+            "screen_target_kb": 200,    # JPEG budget; quality, then resolution, adapt to it
+            "screen_changed_tiles": 0,  # changed tiles (of 16x16) that still reuse the last screenshot
+            "screen_max_age_s": 10,     # never reuse a screenshot older than this
             "gemini_key": "",
             "gemini_model": "gemini-1.5-flash",
             "local_llm_url": "http://127.0.0.1:1234",
+            "local_llm_urls": [],       # more OpenAI-compatible servers; requests go to the fastest healthy one
+            "llm_hedge": False,         # with several servers: also ask the next one if the first is slow
+            "llm_hedge_delay_ms": 1000, # hedge delay until there are enough samples for a p95
+            "fuzzy_threshold": 85,      # 0..100 similarity for misheard phrases, 0 disables
+            "match_cache_size": 256,    # utterance -> intent LRU, 0 disables
             "entries": [],
             "workspaces": [],
             "iot_devices": []
@@ -46,6 +89,7 @@ class Config:
                 self.data[key] = val
 
     def save(self):
+        self.version += 1
         try:
             with open(CONFIG_FILE, "w", encoding="utf-8") as f:
                 json.dump(self.data, f, indent=2, ensure_ascii=False)
@@ -65,6 +109,7 @@ class Config:
 
     def update_entries(self, new_list):
         self.data["entries"] = new_list
+        self.phrases_version += 1
         self.save()
 
     def get_workspaces(self): 
@@ -72,6 +117,7 @@ class Config:
 
     def update_workspaces(self, new_list):
         self.data["workspaces"] = new_list
+        self.phrases_version += 1
         self.save()
 
     def get_iot_devices(self): 
@@ -79,4 +125,5 @@ class Config:
 
     def update_iot_devices(self, new_list):
         self.data["iot_devices"] = new_list
+        self.phrases_version += 1
         self.save()
\ No newline at end of file
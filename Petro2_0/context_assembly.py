@@ -0,0 +1,71 @@
+import time
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+LOGGER = logging.getLogger(__name__)
+
+
+class ContextAssembler:
+    """
+    Runs the retrieval steps of one request (memory lookup, web search, ...)
+    concurrently on a shared pool and waits for them under a single deadline,
+    so the wait is the slowest source rather than the sum of all of them.
+    Sources that miss the deadline are left out; their threads finish in the
+    background and the result is discarded.
+    """
+    def __init__(self, workers=4, report_every=50):
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="context")
+        self.report_every = report_every
+        self.lock = threading.Lock()
+        self.gathers = 0
+        self.counters = {}  # source -> {"ok": n, "late": n, "error": n, "ms": last latency}
+
+    def gather(self, sources, deadline_s, cancelled=None):
+        """
+        sources: {name: callable}. Returns {name: result} for the sources that
+        finished within deadline_s without raising. `cancelled` is polled so
+        a superseded request stops waiting early.
+        """
+        t0 = time.perf_counter()
+        futures = {self.pool.submit(fn): name for name, fn in sources.items()}
+        results, pending = {}, set(futures)
+        end = t0 + max(0.0, deadline_s)
+        while pending:
+            left = end - time.perf_counter()
+            if left <= 0 or (cancelled and cancelled()): break
+            done, pending = wait(pending, timeout=min(left, 0.1), return_when=FIRST_COMPLETED)
+            for fut in done:
+                name = futures[fut]
+                try:
+                    results[name] = fut.result()
+                    self._count(name, "ok", time.perf_counter() - t0)
+                except Exception as e:
+                    LOGGER.error(f"Context source '{name}' failed: {e}")
+                    self._count(name, "error", time.perf_counter() - t0)
+        for fut in pending:
+            fut.cancel()  # no-op if it already started
+            self._count(futures[fut], "late", time.perf_counter() - t0)
+        if pending: LOGGER.info(f"Context: {', '.join(futures[f] for f in pending)} missed the {deadline_s:.1f}s deadline")
+        with self.lock:
+            self.gathers += 1
+            report = self.gathers % self.report_every == 0
+        if report: LOGGER.info(f"Context sources: {self.stats()}")
+        return results
+
+    def background(self, fn):
+        """Fire-and-forget work that helps the request but is never waited on."""
+        def run():
+            try: fn()
+            except Exception as e: LOGGER.debug(f"Background context task failed: {e}")
+        self.pool.submit(run)
+
+    def _count(self, name, outcome, elapsed):
+        with self.lock:
+            c = self.counters.setdefault(name, {"ok": 0, "late": 0, "error": 0, "ms": 0.0})
+            c[outcome] += 1
+            c["ms"] = round(elapsed * 1000, 1)
+
+    def stats(self):
+        with self.lock:
+            return {name: dict(c) for name, c in self.counters.items()}
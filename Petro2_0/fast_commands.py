@@ -1,57 +1,267 @@
 import re
-from typing import Optional, Dict
+import heapq
+import threading
+from collections import defaultdict, OrderedDict
+from typing import Optional, Dict, List, Tuple
 from config import Config
 
+# Fast edit-distance ratio (python-Levenshtein -> thefuzz -> difflib)
+try:
+    from Levenshtein import ratio as _lev_ratio
+    def similarity(a: str, b: str) -> float: return _lev_ratio(a, b) * 100
+except ImportError:
+    try:
+        from thefuzz.fuzz import ratio as similarity
+    except ImportError:
+        from difflib import SequenceMatcher
+        def similarity(a: str, b: str) -> float: return SequenceMatcher(None, a, b).ratio() * 100
+
+# Order of phrase groups in the old cascade: lower value wins
+KIND_OPEN, KIND_CLOSE, KIND_WORKSPACE, KIND_IOT = 0, 1, 2, 3
+
+ENTRY_VERBS = ["відкрий", "запусти", "закрий", "вимкни"]
+# Fixed vocabulary of the built-in commands (for the Vosk command grammar)
+COMMAND_PHRASES = [
+    "що ти вмієш", "твої можливості", "як ти працюєш", "твоя архітектура", "принцип роботи",
+    "таймер", "засічи", "хвилин", "стоп таймер", "згорни вікна", "покажи робочий стіл",
+    "запам'ятай", "очисти пам'ять", "що на екрані", "статистика"
+]
+
+
+class PhraseIndex:
+    """
+    Aho-Corasick automaton over all configured voice phrases.
+    Every phrase carries tags (kind, rank, payload); one pass over the text
+    returns the best tag, i.e. the one the old nested loops would have hit first.
+    """
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[Tuple[int, int, dict]]] = [[]]
+
+    def add(self, phrase: str, kind: int, rank: int, payload: dict):
+        if not phrase: return
+        state = 0
+        for ch in phrase:
+            nxt = self.goto[state].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[state][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            state = nxt
+        self.out[state].append((kind, rank, payload))
+
+    def build(self):
+        # BFS over the trie, merging outputs along failure links
+        queue = list(self.goto[0].values())
+        for state in queue:
+            for ch, nxt in self.goto[state].items():
+                f = self.fail[state]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+                queue.append(nxt)
+        return self
+
+    def best(self, text: str, kinds) -> Optional[Tuple[int, int, dict]]:
+        best = None
+        state = 0
+        goto, fail, out = self.goto, self.fail, self.out
+        for ch in text:
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for tag in out[state]:
+                if tag[0] in kinds and (best is None or tag[:2] < best[:2]):
+                    best = tag
+        return best
+
+
+class FuzzyPhraseIndex:
+    """
+    Character trigram inverted index for misrecognized phrases ("діскорт").
+    Candidates are pruned by shared trigrams and length before the edit-distance
+    ratio is computed. Windows, candidates and scanned postings are capped:
+    posting lists are read rarest first (IDF order) until MAX_POSTINGS ids per
+    window, so trigrams common to many phrases are skipped and the worst case
+    does not grow with the number of phrases.
+    """
+    MIN_PHRASE_LEN = 4
+    MAX_WORDS = 12
+    MAX_CANDIDATES = 8
+    MAX_POSTINGS = 2048
+
+    def __init__(self):
+        self.phrases: List[Tuple[str, int, int, dict]] = []
+        # word count -> trigram -> phrase ids
+        self.grams: Dict[int, Dict[str, List[int]]] = defaultdict(lambda: defaultdict(list))
+
+    @staticmethod
+    def _trigrams(text: str):
+        padded = f" {text} "
+        return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+    def add(self, phrase: str, kind: int, rank: int, payload: dict):
+        phrase = " ".join(phrase.split())
+        if len(phrase) < self.MIN_PHRASE_LEN: return
+        pid = len(self.phrases)
+        self.phrases.append((phrase, kind, rank, payload))
+        n_words = len(phrase.split())
+        for g in self._trigrams(phrase):
+            self.grams[n_words][g].append(pid)
+
+    def best(self, text: str, kinds, threshold: float) -> Optional[Tuple[int, int, dict]]:
+        words = text.split()[:self.MAX_WORDS]
+        best, best_score = None, 0
+        for n_words, grams in self.grams.items():
+            for i in range(len(words) - n_words + 1):
+                window = " ".join(words[i:i + n_words])
+                shared = defaultdict(int)
+                budget = self.MAX_POSTINGS
+                for ids in sorted((grams[g] for g in self._trigrams(window) if g in grams), key=len):
+                    if budget <= 0: break
+                    for pid in ids[:budget]:
+                        shared[pid] += 1
+                    budget -= len(ids)
+                candidates = heapq.nlargest(self.MAX_CANDIDATES, shared, key=shared.get)
+                for pid in candidates:
+                    phrase, kind, rank, payload = self.phrases[pid]
+                    if kind not in kinds: continue
+                    # Upper bound of the ratio from lengths alone
+                    la, lb = len(phrase), len(window)
+                    if 200 * min(la, lb) / (la + lb) < max(threshold, best_score): continue
+                    score = similarity(window, phrase)
+                    if score < threshold: continue
+                    key = (kind, rank, payload)
+                    if best is None or score > best_score or (score == best_score and key[:2] < best[:2]):
+                        best, best_score = key, score
+        return best
+
+
 class FastCommandMatcher:
     def __init__(self):
         self.cfg = Config()
+        # (phrases version, exact index, fuzzy index): replaced as one, so readers never mix two builds
+        self._indexes = None
+        # Utterance -> intent LRU (negative results included)
+        self._cache = OrderedDict()
+        self._cache_version = None
+        self._cache_lock = threading.Lock()
+        self.cache_hits = 0
+        self.cache_misses = 0
+
+    def _get_index(self) -> Tuple[PhraseIndex, FuzzyPhraseIndex]:
+        # Rebuilt only when Config.update_entries/workspaces/iot_devices touched the data
+        indexes = self._indexes
+        if indexes is None or indexes[0] != self.cfg.phrases_version:
+            version = self.cfg.phrases_version
+            indexes = self._indexes = (version, *self._build_index())
+        return indexes[1], indexes[2]
+
+    def _build_index(self):
+        idx, fuzzy = PhraseIndex(), FuzzyPhraseIndex()
+        def add(phrase, kind, rank, payload):
+            idx.add(phrase, kind, rank, payload)
+            fuzzy.add(phrase, kind, rank, payload)
+
+        for rank, entry in enumerate(self.cfg.get_entries()):
+            for vname in entry.get("voice_phrases", []):
+                add(vname, KIND_OPEN, rank, {"intent": "OPEN_ENTRY", "params": {"entry_id": entry["id"]}})
+                if entry.get("type") == "app":
+                    add(vname, KIND_CLOSE, rank, {"intent": "CLOSE_APP", "params": {"app_name": entry["id"]}})
+        for rank, ws in enumerate(self.cfg.get_workspaces()):
+            for vname in ws.get("voice_phrases", []):
+                add(vname, KIND_WORKSPACE, rank, {"intent": "RUN_WORKSPACE", "params": {"workspace_id": ws["id"]}})
+        rank = 0
+        for dev in self.cfg.get_iot_devices():
+            for action in dev.get("actions", []):
+                for phrase in action.get("voice_phrases", []):
+                    add(phrase, KIND_IOT, rank, {"intent": "IOT_ACTION", "params": {"device_id": dev["id"], "action_name": action["name"]}})
+                rank += 1
+        return idx.build(), fuzzy
+
+    def grammar_phrases(self) -> List[str]:
+        """Every phrase the matcher can act on, for a grammar-constrained recognizer."""
+        phrases = ENTRY_VERBS + COMMAND_PHRASES
+        for entry in self.cfg.get_entries():
+            for vname in entry.get("voice_phrases", []):
+                phrases += [vname] + [f"{verb} {vname}" for verb in ENTRY_VERBS]
+        for ws in self.cfg.get_workspaces():
+            phrases += ws.get("voice_phrases", [])
+        for dev in self.cfg.get_iot_devices():
+            for action in dev.get("actions", []):
+                phrases += action.get("voice_phrases", [])
+        return list(dict.fromkeys(p.lower().strip() for p in phrases if p.strip()))
 
     def match(self, text: str) -> Optional[Dict]:
         text = text.lower().strip()
+        size = self.cfg.get("match_cache_size", 256)
+        if not size:
+            return self._match(text)
+
+        with self._cache_lock:
+            if self._cache_version != self.cfg.version:
+                self._cache.clear()
+                self._cache_version = self.cfg.version
+            version = self._cache_version
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                self.cache_hits += 1
+                return self._copy(self._cache[text])
+            self.cache_misses += 1
 
+        res = self._match(text)
+        with self._cache_lock:
+            # Config saved while matching: the result may be stale, don't keep it
+            if self.cfg.version == version == self._cache_version:
+                self._cache[text] = res
+                while len(self._cache) > size:
+                    self._cache.popitem(last=False)
+        return self._copy(res)
+
+    def cache_stats(self) -> Dict:
+        total = self.cache_hits + self.cache_misses
+        return {
+            "hits": self.cache_hits,
+            "misses": self.cache_misses,
+            "size": len(self._cache),
+            "hit_rate": round(self.cache_hits / total, 3) if total else 0.0
+        }
+
+    @staticmethod
+    def _copy(res: Optional[Dict]) -> Optional[Dict]:
+        # Cached dicts are shared, callers get their own copy
+        if res is None: return None
+        return {"intent": res["intent"], "params": dict(res.get("params", {}))}
+
+    def _match(self, text: str) -> Optional[Dict]:
         # --- COURSEWORK DEFENSE ---
         if "що ти вмієш" in text or "твої можливості" in text:
             return {"intent": "DEFENSE_CAPABILITIES", "params": {}}
-        
+
         if "як ти працюєш" in text or "твоя архітектура" in text or "принцип роботи" in text:
              return {"intent": "DEFENSE_ARCHITECTURE", "params": {}}
 
-        # --- 1. Entries ---
-        entries = self.cfg.get_entries()
+        index, fuzzy = self._get_index()
+
+        # --- 1. Entries (matched on the text with the verb removed) ---
+        open_target = close_target = None
         if text.startswith("відкрий") or text.startswith("запусти"):
-            target = text.replace("відкрий", "").replace("запусти", "").strip()
-            for entry in entries:
-                for vname in entry.get("voice_phrases", []):
-                    if vname in target:
-                        return {"intent": "OPEN_ENTRY", "params": {"entry_id": entry["id"]}}
-        
+            open_target = text.replace("відкрий", "").replace("запусти", "").strip()
+            hit = index.best(open_target, (KIND_OPEN,))
+            if hit: return self._result(hit, text)
+
         if text.startswith("закрий") or text.startswith("вимкни"):
-            target = text.replace("закрий", "").replace("вимкни", "").strip()
-            for entry in entries:
-                if entry.get("type") == "app":
-                    for vname in entry.get("voice_phrases", []):
-                        if vname in target:
-                            return {"intent": "CLOSE_APP", "params": {"app_name": entry["id"]}}
+            close_target = text.replace("закрий", "").replace("вимкни", "").strip()
+            hit = index.best(close_target, (KIND_CLOSE,))
+            if hit: return self._result(hit, text)
 
-        # --- 2. Protocols (Workspaces) ---
-        workspaces = self.cfg.get_workspaces()
-        for ws in workspaces:
-            for vname in ws.get("voice_phrases", []):
-                if vname in text:
-                    return {"intent": "RUN_WORKSPACE", "params": {"workspace_id": ws["id"]}}
-
-        # --- 3. IoT ---
-        for dev in self.cfg.get_iot_devices():
-            for action in dev.get("actions", []):
-                for phrase in action.get("voice_phrases", []):
-                    if phrase in text:
-                        import re
-                        num_match = re.search(r'\d+', text)
-                        val = int(num_match.group()) if num_match else None
-                        return {
-                            "intent": "IOT_ACTION", 
-                            "params": {"device_id": dev["id"], "action_name": action["name"], "value": val}
-                        }
+        # --- 2. Protocols (Workspaces) + 3. IoT ---
+        hit = index.best(text, (KIND_WORKSPACE, KIND_IOT))
+        if hit: return self._result(hit, text)
 
         # --- 4. Timer ---
         if "таймер" in text or "засічи" in text:
@@ -65,12 +275,31 @@ class FastCommandMatcher:
             return {"intent": "WINDOW_MANAGEMENT", "params": {"action": "minimize_all"}}
         if "покажи робочий стіл" in text:
             return {"intent": "WINDOW_MANAGEMENT", "params": {"action": "minimize_all"}}
-        
+
         # --- 6. Notes/Memory ---
         if "запам'ятай" in text: return {"intent": "REMEMBER_FACT", "params": {"text": text}}
         if "очисти" in text and "пам'ят" in text: return {"intent": "CLEAR_MEMORY", "params": {}}
-        
+
         if "що" in text and "екрані" in text: return {"intent": "VISION_QUERY", "params": {}}
         if "статистик" in text: return {"intent": "SYSTEM_STATS", "params": {}}
 
-        return None
\ No newline at end of file
+        # --- 7. Fuzzy (Vosk misrecognitions), only when nothing exact matched ---
+        threshold = self.cfg.get("fuzzy_threshold", 85)
+        if threshold:
+            hit = None
+            if open_target: hit = fuzzy.best(open_target, (KIND_OPEN,), threshold)
+            if not hit and close_target: hit = fuzzy.best(close_target, (KIND_CLOSE,), threshold)
+            if not hit: hit = fuzzy.best(text, (KIND_WORKSPACE, KIND_IOT), threshold)
+            if hit: return self._result(hit, text)
+
+        return None
+
+    @staticmethod
+    def _result(hit, text: str) -> Dict:
+        # Fresh copy: callers may mutate the returned dict
+        payload = hit[2]
+        res = {"intent": payload["intent"], "params": dict(payload["params"])}
+        if hit[0] == KIND_IOT:
+            num_match = re.search(r'\d+', text)
+            res["params"]["value"] = int(num_match.group()) if num_match else None
+        return res
@@ -0,0 +1,100 @@
+import logging
+import threading
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from config import Config
+
+LOGGER = logging.getLogger(__name__)
+
+# Per-backend policy. timeout = (connect, read); read is also the max gap
+# between chunks of a streamed answer. Retries cover connection failures
+# (the request never left), plus 429/5xx where repeating is harmless.
+PROFILES = {
+    "llm":     {"timeout": (3, 60), "retries": 1, "backoff": 0.3, "retry_status": True},
+    # Several local servers: LLMRouter fails over itself, so no retries here
+    "llm_pool": {"timeout": (2, 60), "retries": 0, "backoff": 0, "retry_status": False},
+    "gemini":  {"timeout": (5, 30), "retries": 2, "backoff": 0.5, "retry_status": True},
+    "iot":     {"timeout": (2, 5),  "retries": 1, "backoff": 0.1, "retry_status": False},
+    "default": {"timeout": (5, 20), "retries": 1, "backoff": 0.3, "retry_status": False},
+}
+
+
+class HttpClient:
+    """
+    Singleton HTTP layer: one keep-alive requests.Session per backend profile,
+    each with per-host connection pools and its own retry/backoff policy.
+    Profiles can be overridden in config, e.g.
+        "http_profiles": {"iot": {"timeout": [1, 3], "retries": 0}}
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(HttpClient, cls).__new__(cls)
+            cls._instance._setup()
+        return cls._instance
+
+    def _setup(self):
+        self.cfg = Config()
+        self.lock = threading.Lock()
+        self.sessions = {}
+        self.requests = {}
+        self.errors = {}
+
+    def profile(self, name):
+        prof = dict(PROFILES.get(name, PROFILES["default"]))
+        prof.update(self.cfg.get("http_profiles", {}).get(name, {}))
+        prof["timeout"] = tuple(prof["timeout"])
+        return prof
+
+    def session(self, name):
+        with self.lock:
+            sess = self.sessions.get(name)
+            if sess: return sess
+            prof = self.profile(name)
+            retry = Retry(total=prof["retries"], connect=prof["retries"], read=0,
+                          status=prof["retries"] if prof["retry_status"] else 0,
+                          status_forcelist=(429, 502, 503, 504), backoff_factor=prof["backoff"],
+                          allowed_methods=None, raise_on_status=False)
+            adapter = HTTPAdapter(pool_connections=16, pool_maxsize=8, max_retries=retry)
+            sess = requests.Session()
+            sess.mount("http://", adapter)
+            sess.mount("https://", adapter)
+            self.sessions[name] = sess
+            return sess
+
+    def request(self, profile, method, url, **kwargs):
+        if kwargs.get("timeout") is None: kwargs["timeout"] = self.profile(profile)["timeout"]
+        with self.lock:
+            self.requests[profile] = self.requests.get(profile, 0) + 1
+            total = sum(self.requests.values())
+        if total % 100 == 0: LOGGER.info(f"HTTP: {self.stats()}")
+        try:
+            return self.session(profile).request(method, url, **kwargs)
+        except requests.RequestException:
+            with self.lock:
+                self.errors[profile] = self.errors.get(profile, 0) + 1
+            raise
+
+    def get(self, profile, url, **kwargs):
+        return self.request(profile, "GET", url, **kwargs)
+
+    def post(self, profile, url, **kwargs):
+        return self.request(profile, "POST", url, **kwargs)
+
+    def stats(self):
+        """Per profile: requests, errors, new vs reused connections (from urllib3's pool counters)."""
+        out = {}
+        for name, sess in list(self.sessions.items()):
+            adapter = sess.get_adapter("https://")
+            pools = adapter.poolmanager.pools
+            new = sent = 0
+            for key in list(pools.keys()):
+                pool = pools.get(key)
+                if pool is None: continue
+                new += pool.num_connections
+                sent += pool.num_requests
+            out[name] = {"requests": self.requests.get(name, 0), "errors": self.errors.get(name, 0),
+                         "new_connections": new, "reused": max(0, sent - new), "hosts": len(pools)}
+        return out
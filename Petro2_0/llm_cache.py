@@ -0,0 +1,116 @@
+import re
+import time
+import sqlite3
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+LOGGER = logging.getLogger(__name__)
+
+# Answers to these depend on the moment they are asked: never cached
+TIME_SENSITIVE = re.compile(
+    r"годин|котр[аи]\b|час\b|зараз|сьогодн|завтра|вчора|нині|погод|новин|курс\b|валют|цін[аиу]\b|дат[аиу]\b|числ[оа]\b|тижд|"
+    r"\btime\b|\btoday\b|\bnow\b|weather|news|price",
+    re.IGNORECASE)
+
+
+def normalize(text):
+    """Case, whitespace and trailing punctuation do not change the question."""
+    return re.sub(r"\s+", " ", (text or "").lower()).strip().rstrip("?!. ")
+
+
+class LLMCache:
+    """
+    Cache of LLM answers keyed on (backend, model, system prompt, memory
+    context, user text), all normalized. Entries expire after `ttl` seconds.
+    In-memory LRU; with db_path set, also persisted in SQLite across restarts.
+    """
+    def __init__(self, ttl=3600, size=128, db_path=None):
+        self.ttl = ttl
+        self.size = size
+        self.db_path = db_path
+        self.lock = threading.Lock()
+        self.items = OrderedDict()  # key -> (created, answer)
+        self.hits = self.misses = self.skipped = 0
+        if db_path: self._init_db()
+
+    @staticmethod
+    def cacheable(text):
+        return bool(normalize(text)) and not TIME_SENSITIVE.search(text)
+
+    @staticmethod
+    def key(backend, model, system, memory_context, text):
+        parts = [backend, model, normalize(system), normalize(memory_context), normalize(text)]
+        return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        now = time.time()
+        with self.lock:
+            item = self.items.get(key)
+            if item and now - item[0] < self.ttl:
+                self.items.move_to_end(key)
+                self.hits += 1
+                return item[1]
+            self.items.pop(key, None)
+        item = self._db_get(key, now)
+        with self.lock:
+            if item:
+                self._put_memory(key, item)
+                self.hits += 1
+                return item[1]
+            self.misses += 1
+        return None
+
+    def put(self, key, answer):
+        item = (time.time(), answer)
+        with self.lock:
+            self._put_memory(key, item)
+        self._db_put(key, item)
+
+    def skip(self):
+        with self.lock: self.skipped += 1
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {"hits": self.hits, "misses": self.misses, "skipped": self.skipped,
+                "hit_rate": round(self.hits / total, 3) if total else 0.0, "entries": len(self.items)}
+
+    def _put_memory(self, key, item):
+        self.items[key] = item
+        self.items.move_to_end(key)
+        while len(self.items) > self.size: self.items.popitem(last=False)
+
+    # --- SQLite tier ---
+    def _init_db(self):
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_cache (key TEXT PRIMARY KEY, created REAL, answer TEXT)")
+            conn.execute("DELETE FROM llm_cache WHERE created < ?", (time.time() - self.ttl,))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            LOGGER.error(f"LLM cache DB init error: {e}")
+            self.db_path = None
+
+    def _db_get(self, key, now):
+        if not self.db_path: return None
+        try:
+            conn = sqlite3.connect(self.db_path)
+            row = conn.execute("SELECT created, answer FROM llm_cache WHERE key = ? AND created >= ?",
+                               (key, now - self.ttl)).fetchone()
+            conn.close()
+            return tuple(row) if row else None
+        except Exception as e:
+            LOGGER.error(f"LLM cache DB read error: {e}")
+            return None
+
+    def _db_put(self, key, item):
+        if not self.db_path: return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            conn.execute("INSERT OR REPLACE INTO llm_cache (key, created, answer) VALUES (?, ?, ?)", (key, *item))
+            conn.commit()
+            conn.close()
+        except Exception as e:
+            LOGGER.error(f"LLM cache DB write error: {e}")
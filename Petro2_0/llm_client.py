@@ -0,0 +1,63 @@
+"""
+Streaming clients for the LLM back ends. Both yield text deltas as they
+arrive, so the UI and TTS can start before the completion is finished:
+- OpenAI-compatible /v1/chat/completions with "stream": true (SSE);
+- Gemini :streamGenerateContent?alt=sse.
+"""
+import json
+from http_client import HttpClient
+
+GEMINI_URL = "https://generativelanguage.googleapis.com/v1beta"
+
+
+def iter_sse(response):
+    """Yields the data field of each server-sent event."""
+    data = []
+    for line in _iter_lines(response):
+        if not line:
+            # Blank line ends an event
+            if data: yield "\n".join(data)
+            data = []
+        elif line.startswith("data:"):
+            data.append(line[5:].lstrip(" "))
+        # ":" comments, event: and id: fields are not used by either API
+    if data: yield "\n".join(data)
+
+
+def _iter_lines(response):
+    # iter_lines() waits for 512-byte chunks; read whatever has arrived instead
+    buf = b""
+    for chunk in response.iter_content(chunk_size=None):
+        buf += chunk
+        *lines, buf = buf.split(b"\n")
+        for line in lines: yield line.rstrip(b"\r").decode("utf-8")
+    if buf: yield buf.rstrip(b"\r").decode("utf-8")
+
+
+def _timeout(kwargs, timeout):
+    # None: the profile's (connect, read) timeouts from HttpClient
+    if timeout is not None: kwargs["timeout"] = timeout
+    return kwargs
+
+
+def stream_openai(url, payload, timeout=None, profile="llm"):
+    """Text deltas of an OpenAI-compatible chat completion."""
+    kwargs = _timeout({"json": dict(payload, stream=True), "stream": True}, timeout)
+    with HttpClient().post(profile, url, **kwargs) as r:
+        r.raise_for_status()
+        for data in iter_sse(r):
+            if data == "[DONE]": return
+            for choice in json.loads(data).get("choices", []):
+                delta = (choice.get("delta") or {}).get("content")
+                if delta: yield delta
+
+
+def stream_gemini(model, key, payload, timeout=None, base_url=GEMINI_URL):
+    """Text deltas of a Gemini generateContent request."""
+    url = f"{base_url}/models/{model}:streamGenerateContent?alt=sse&key={key}"
+    with HttpClient().post("gemini", url, **_timeout({"json": payload, "stream": True}, timeout)) as r:
+        r.raise_for_status()
+        for data in iter_sse(r):
+            for cand in json.loads(data).get("candidates", []):
+                for part in cand.get("content", {}).get("parts", []):
+                    if part.get("text"): yield part["text"]
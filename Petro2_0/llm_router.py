@@ -0,0 +1,349 @@
+"""
+Routing across several OpenAI-compatible LLM servers.
+
+Every endpoint keeps EWMAs of its response latency, one for plain calls
+(whole answer) and one for streams (time to first token), and a circuit
+breaker. Requests go to the endpoint fastest for their kind that is healthy; connection errors, timeouts and 5xx fail over to the next one.
+With hedging on, a second endpoint is asked as well if the first has not
+answered within its p95 latency, and whichever answers first wins.
+
+Endpoints that fail `fail_threshold` times in a row are ejected for a
+cooldown that doubles on every repeated failure. A background thread
+probes ejected endpoints (GET /v1/models) and lets them back in for a
+trial request once they respond.
+"""
+import time
+import queue
+import logging
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import requests
+from urllib3.exceptions import TimeoutError as Urllib3Timeout
+from http_client import HttpClient
+from llm_client import stream_openai
+
+LOGGER = logging.getLogger(__name__)
+
+CLOSED, OPEN, HALF_OPEN = "closed", "open", "half-open"
+PLAIN, STREAM = "plain", "stream"  # latency kinds: whole answer vs time to first token
+
+
+class Endpoint:
+    """One server: latency estimates per request kind and circuit-breaker state."""
+    def __init__(self, url, alpha=0.3):
+        self.url = url.rstrip("/")
+        self.alpha = alpha
+        self.ewma = {PLAIN: None, STREAM: None}  # seconds; None until the first answer
+        self.samples = {PLAIN: deque(maxlen=50), STREAM: deque(maxlen=50)}
+        self.inflight = 0
+        self.failures = 0  # consecutive
+        self.state = CLOSED
+        self.open_until = 0.0
+        self.cooldown = 0.0
+        self.served = self.errors = 0
+
+    def score(self, kind=PLAIN):
+        # Unmeasured endpoints go first so each one gets a latency sample, but not
+        # while that first request is still out; busy ones look slower
+        if self.ewma[kind] is None: return float("inf") if self.inflight else 0.0
+        return self.ewma[kind] * (1 + self.inflight)
+
+    def p95(self, kind=PLAIN):
+        vals = sorted(self.samples[kind])
+        return vals[min(len(vals) - 1, int(len(vals) * 0.95))] if vals else None
+
+
+def _timed_out(e):
+    # requests wraps some read timeouts in ConnectionError: ReadTimeoutError while reading
+    # a streamed body, MaxRetryError(reason=ReadTimeoutError) with retries mounted
+    if isinstance(e, requests.Timeout): return True
+    cause = e.args[0] if e.args else None
+    return isinstance(cause, Urllib3Timeout) or isinstance(getattr(cause, "reason", None), Urllib3Timeout)
+
+
+def _node_failure(e, deadline=None):
+    """
+    Errors that say something about the server, not about the request.
+    A timeout under a caller's deadline (a timeout shorter than the profile's)
+    says the request ran out of time, not that the server is down.
+    """
+    if deadline is not None and _timed_out(e): return False
+    if isinstance(e, requests.HTTPError) and e.response is not None: return e.response.status_code >= 500
+    return True
+
+
+class LLMRouter:
+    def __init__(self, urls, hedge=False, hedge_delay_s=1.0, hedge_min_s=0.2, fail_threshold=3,
+                 cooldown_s=10, max_cooldown_s=120, health_every_s=5, profile="llm_pool", report_every=50):
+        self.endpoints = [Endpoint(u) for u in dict.fromkeys(u for u in urls if u)]
+        self.hedge = hedge
+        self.hedge_delay_s = hedge_delay_s
+        self.hedge_min_s = hedge_min_s
+        self.fail_threshold = fail_threshold
+        self.cooldown_s = cooldown_s
+        self.max_cooldown_s = max_cooldown_s
+        self.health_every_s = health_every_s
+        self.profile = profile
+        self.report_every = report_every
+        self.http = HttpClient()
+        self.lock = threading.Lock()
+        self.pool = self._new_pool()
+        self.health_thread = None
+        self.closed = threading.Event()
+        self.active = 0  # complete() calls in flight; the pool outlives close() until they finish
+        self.counters = {"requests": 0, "hedged": 0, "hedge_wins": 0, "failovers": 0, "ejected": 0}
+
+    def _new_pool(self):
+        return ThreadPoolExecutor(max_workers=max(8, 4 * len(self.endpoints)), thread_name_prefix="llm-route")
+
+    # --- Selection ---
+    def ranked(self, kind=PLAIN):
+        """Endpoints to try, best first: healthy by latency, then trial ones, then ejected as a last resort."""
+        now = time.time()
+        with self.lock:
+            for ep in self.endpoints:
+                if ep.state == OPEN and now >= ep.open_until: ep.state = HALF_OPEN
+            closed = sorted((e for e in self.endpoints if e.state == CLOSED), key=lambda e: e.score(kind))
+            trial = [e for e in self.endpoints if e.state == HALF_OPEN]
+            ejected = sorted((e for e in self.endpoints if e.state == OPEN), key=lambda e: e.open_until)
+        return closed + trial + ejected
+
+    def best_url(self, kind=PLAIN):
+        ranked = self.ranked(kind)
+        return ranked[0].url if ranked else None
+
+    def hedge_after(self, ep, kind=PLAIN):
+        """Seconds to wait for `ep` before asking a second endpoint."""
+        with self.lock:
+            p95 = ep.p95(kind) if len(ep.samples[kind]) >= 10 else None
+        return max(self.hedge_min_s, p95) if p95 is not None else self.hedge_delay_s
+
+    # --- Outcome bookkeeping ---
+    def _begin(self, ep):
+        with self.lock: ep.inflight += 1
+
+    def _end(self, ep):
+        with self.lock: ep.inflight -= 1
+
+    def _succeeded(self, ep, latency, kind=PLAIN):
+        with self.lock:
+            ewma = ep.ewma[kind]
+            ep.ewma[kind] = latency if ewma is None else ep.alpha * latency + (1 - ep.alpha) * ewma
+            ep.samples[kind].append(latency)
+            ep.served += 1
+            ep.failures = 0
+            if ep.state != CLOSED: LOGGER.info(f"LLM endpoint {ep.url} is back")
+            ep.state, ep.cooldown = CLOSED, 0.0
+
+    def _failed(self, ep, e, deadline=None):
+        if not _node_failure(e, deadline): return
+        with self.lock:
+            ep.errors += 1
+            ep.failures += 1
+            if ep.state == HALF_OPEN or ep.failures >= self.fail_threshold:
+                ep.cooldown = min(self.max_cooldown_s, ep.cooldown * 2 or self.cooldown_s)
+                ep.open_until = time.time() + ep.cooldown
+                if ep.state != OPEN: self.counters["ejected"] += 1
+                ep.state = OPEN
+                LOGGER.warning(f"LLM endpoint {ep.url} ejected for {ep.cooldown:.0f}s: {e}")
+                start = self.health_thread is None and not self.closed.is_set()
+                if start:
+                    self.health_thread = threading.Thread(target=self._health_loop, daemon=True, name="llm-health")
+            else:
+                start = False
+        if start: self.health_thread.start()
+
+    def _count(self, name):
+        with self.lock:
+            self.counters[name] += 1
+            report = name == "requests" and self.counters[name] % self.report_every == 0
+        if report: LOGGER.info(f"LLM router: {self.stats()}")
+
+    # --- Requests ---
+    def _deadline(self, timeout):
+        """Monotonic time a caller-shortened timeout runs out; None when it is not shorter than the profile's."""
+        if timeout is None: return None
+        connect, read = timeout if isinstance(timeout, tuple) else (timeout, timeout)
+        own_connect, own_read = self.http.profile(self.profile)["timeout"]
+        if connect >= own_connect and read >= own_read: return None
+        return time.monotonic() + read
+
+    def _may_retry(self, deadline):
+        return deadline is None or time.monotonic() < deadline
+
+    def complete(self, payload, timeout=None):
+        """Parsed JSON of a non-streamed chat completion; timeout overrides the profile's."""
+        kwargs = {"timeout": timeout} if timeout else {}
+        deadline = self._deadline(timeout)
+
+        def post(ep):
+            self._begin(ep)
+            t0 = time.perf_counter()
+            try:
+                r = self.http.post(self.profile, f"{ep.url}/v1/chat/completions", json=payload, **kwargs)
+                r.raise_for_status()
+                data = r.json()
+            except Exception as e:
+                self._failed(ep, e, deadline)
+                raise
+            finally:
+                self._end(ep)
+            self._succeeded(ep, time.perf_counter() - t0)
+            return data
+
+        candidates = iter(self.ranked())
+        first = next(candidates, None)
+        if first is None: raise RuntimeError("No LLM endpoints configured")
+        self._count("requests")
+        with self.lock:
+            # Called on a router that was closed meanwhile: a fresh pool, released again when done
+            if self.pool is None: self.pool = self._new_pool()
+            self.active += 1
+        try:
+            return self._race(post, first, candidates, deadline)
+        finally:
+            with self.lock: self.active -= 1
+            self._release_pool()
+
+    def _race(self, post, first, candidates, deadline=None):
+        futures = {self.pool.submit(post, first): first}
+        delay = self.hedge_after(first) if self.hedge and len(self.endpoints) > 1 else None
+        hedges, error = set(), None
+        while futures:
+            done, _ = wait(futures, timeout=delay, return_when=FIRST_COMPLETED)
+            if not done:
+                # First choice is slow: ask the next one too, keep whichever answers first
+                delay = None
+                ep = next(candidates, None)
+                if ep:
+                    self._count("hedged")
+                    hedges.add(ep)
+                    futures[self.pool.submit(post, ep)] = ep
+                continue
+            for fut in done:
+                ep = futures.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    error = e
+                    if not _node_failure(e, deadline): raise
+                    nxt = next(candidates, None) if self._may_retry(deadline) else None
+                    if nxt:
+                        self._count("failovers")
+                        futures[self.pool.submit(post, nxt)] = nxt
+                    continue
+                if ep in hedges: self._count("hedge_wins")
+                return result  # the loser finishes in the background and still updates its latency
+        raise error
+
+    def stream(self, payload, timeout=None):
+        """Text deltas of a streamed completion; a hedge race is decided by the first token."""
+        candidates = iter(self.ranked(STREAM))
+        first = next(candidates, None)
+        if first is None: raise RuntimeError("No LLM endpoints configured")
+        self._count("requests")
+        deadline = self._deadline(timeout)
+        events = queue.Queue()
+        attempts = {}  # endpoint -> stop event
+        hedges = set()
+
+        def launch(ep):
+            stop = attempts[ep] = threading.Event()
+            threading.Thread(target=self._stream_attempt, args=(ep, payload, events, stop, timeout, deadline),
+                             daemon=True, name="llm-stream").start()
+
+        launch(first)
+        delay = self.hedge_after(first, STREAM) if self.hedge and len(self.endpoints) > 1 else None
+        winner = None
+        try:
+            while True:
+                try:
+                    ep, kind, value = events.get(timeout=delay if winner is None else None)
+                except queue.Empty:
+                    delay = None
+                    ep = next(candidates, None)
+                    if ep:
+                        self._count("hedged")
+                        hedges.add(ep)
+                        launch(ep)
+                    continue
+                if winner is None:
+                    if kind == "error":
+                        attempts.pop(ep, None)
+                        if not _node_failure(value, deadline): raise value
+                        nxt = next(candidates, None) if self._may_retry(deadline) else None
+                        if nxt:
+                            self._count("failovers")
+                            launch(nxt)
+                        elif not attempts:
+                            raise value
+                        continue
+                    winner = ep
+                    if ep in hedges: self._count("hedge_wins")
+                    for other, stop in attempts.items():
+                        if other is not ep: stop.set()
+                if ep is not winner: continue
+                if kind == "delta": yield value
+                elif kind == "end": return
+                else: raise value
+        finally:
+            for stop in attempts.values(): stop.set()
+
+    def _stream_attempt(self, ep, payload, events, stop, timeout=None, deadline=None):
+        self._begin(ep)
+        t0 = time.perf_counter()
+        answered = False
+        gen = stream_openai(f"{ep.url}/v1/chat/completions", payload, timeout=timeout, profile=self.profile)
+        try:
+            for delta in gen:
+                if not answered:
+                    # Recorded even for the loser of a race, so its estimate stays current
+                    answered = True
+                    self._succeeded(ep, time.perf_counter() - t0, STREAM)
+                if stop.is_set(): return  # lost the race or the caller went away
+                events.put((ep, "delta", delta))
+            if not answered: self._succeeded(ep, time.perf_counter() - t0, STREAM)
+            events.put((ep, "end", None))
+        except Exception as e:
+            # Only a failure before the first token counts against the endpoint's health
+            if not answered: self._failed(ep, e, deadline)
+            events.put((ep, "error", e))
+        finally:
+            gen.close()
+            self._end(ep)
+
+    # --- Health ---
+    def _health_loop(self):
+        while not self.closed.wait(self.health_every_s):
+            with self.lock: ejected = [e for e in self.endpoints if e.state == OPEN]
+            for ep in ejected:
+                try:
+                    self.http.get(self.profile, f"{ep.url}/v1/models", timeout=(1, 2)).raise_for_status()
+                except Exception:
+                    continue
+                with self.lock:
+                    # Responding again: allow a trial request instead of waiting out the cooldown
+                    if ep.state == OPEN: ep.state = HALF_OPEN
+                LOGGER.info(f"LLM endpoint {ep.url} answers health checks again")
+
+    def close(self):
+        """Stops the health checks; the worker pool is released once requests in flight finish."""
+        self.closed.set()
+        self._release_pool()
+
+    def _release_pool(self):
+        with self.lock:
+            pool = self.pool if self.closed.is_set() and not self.active else None
+            if pool: self.pool = None
+        if pool: pool.shutdown(wait=False)
+
+    def stats(self):
+        def ms(v): return round(v * 1000, 1) if v is not None else None
+        with self.lock:
+            out = dict(self.counters)
+            out["endpoints"] = {e.url: dict({f"{kind}_ewma_ms": ms(e.ewma[kind]) for kind in (PLAIN, STREAM)},
+                                            **{f"{kind}_p95_ms": ms(e.p95(kind)) for kind in (PLAIN, STREAM)},
+                                            state=e.state, served=e.served, errors=e.errors, inflight=e.inflight)
+                                for e in self.endpoints}
+        return out
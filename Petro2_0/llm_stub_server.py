@@ -0,0 +1,183 @@
+"""
+Local stand-in for the LLM endpoints, for offline checks of the streaming path.
+
+Serves OpenAI-compatible /v1/chat/completions (plain and "stream": true) and
+Gemini-style :generateContent / :streamGenerateContent?alt=sse. The reply is
+sent word by word with configurable delays, so time-to-first-token and
+sentence-level TTS can be observed without a model.
+
+    python llm_stub_server.py --port 8765 --first-delay 0.4 --token-delay 0.05
+    (set local_llm_url to http://127.0.0.1:8765)
+
+    python llm_stub_server.py --probe     # measures TTFT through llm_client
+    python llm_stub_server.py --router    # fast/slow/failing stubs behind LLMRouter
+"""
+import re
+import json
+import time
+import random
+import argparse
+import threading
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+DEFAULT_REPLY = ("Звісно! Ось коротка відповідь. Нейронна мережа складається з шарів, "
+                 "кожен з яких перетворює вхідні дані. Навчання підлаштовує ваги так, "
+                 "щоб помилка на прикладах зменшувалась.")
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    # Set on the server: reply, first_delay, token_delay, jitter, error_rate
+    def log_message(self, fmt, *args): pass
+
+    def do_GET(self):
+        if self.path.startswith("/v1/models"): self._whole([], {"data": [{"id": "stub"}]}, delay=0)
+        else: self.send_error(404)
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get("Content-Length", 0)) or 0)
+        if random.random() < self.server.error_rate:
+            self.send_error(503)
+            return
+        try: request = json.loads(body or b"{}")
+        except ValueError: request = {}
+        tokens = re.findall(r"\S+\s*", self.server.reply)
+        if self.path.startswith("/v1/chat/completions"):
+            if request.get("stream"): self._stream(tokens, self._openai_chunk, done="[DONE]")
+            else: self._whole(tokens, {"choices": [{"message": {"role": "assistant", "content": self.server.reply}}]})
+        elif ":streamGenerateContent" in self.path:
+            self._stream(tokens, self._gemini_chunk)
+        elif ":generateContent" in self.path:
+            self._whole(tokens, self._gemini_chunk(self.server.reply))
+        else:
+            self.send_error(404)
+
+    @staticmethod
+    def _openai_chunk(text):
+        return {"choices": [{"index": 0, "delta": {"content": text}}]}
+
+    @staticmethod
+    def _gemini_chunk(text):
+        return {"candidates": [{"content": {"parts": [{"text": text}], "role": "model"}}]}
+
+    def _first_delay(self):
+        return self.server.first_delay + random.uniform(0, self.server.jitter)
+
+    def _whole(self, tokens, payload, delay=None):
+        time.sleep(self._first_delay() + self.server.token_delay * len(tokens) if delay is None else delay)
+        data = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _stream(self, tokens, chunk, done=None):
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.send_header("Transfer-Encoding", "chunked")  # like real servers: one chunk per event
+        self.end_headers()
+        time.sleep(self._first_delay())
+        try:
+            for i, tok in enumerate(tokens):
+                if i: time.sleep(self.server.token_delay)
+                self._event(json.dumps(chunk(tok), ensure_ascii=False))
+            if done: self._event(done)
+            self.wfile.write(b"0\r\n\r\n")
+        except (BrokenPipeError, ConnectionResetError):
+            self.close_connection = True  # client cancelled
+
+    def _event(self, data):
+        event = f"data: {data}\n\n".encode("utf-8")
+        self.wfile.write(b"%x\r\n%s\r\n" % (len(event), event))
+        self.wfile.flush()
+
+
+def start_stub(port=0, reply=DEFAULT_REPLY, first_delay=0.3, token_delay=0.05, jitter=0.0, error_rate=0.0):
+    """
+    Starts the stub on a daemon thread; returns (server, base_url).
+    jitter adds up to that many seconds to the first delay; error_rate is
+    the share of requests answered with 503.
+    """
+    server = ThreadingHTTPServer(("127.0.0.1", port), StubHandler)
+    server.daemon_threads = True
+    server.reply, server.first_delay, server.token_delay = reply, first_delay, token_delay
+    server.jitter, server.error_rate = jitter, error_rate
+    threading.Thread(target=server.serve_forever, daemon=True, name="llm-stub").start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+def probe(base_url):
+    """Time-to-first-token and total time of one streamed local completion."""
+    from llm_client import stream_openai
+    payload = {"messages": [{"role": "user", "content": "привіт"}]}
+    t0 = time.perf_counter()
+    ttft, parts = None, []
+    for delta in stream_openai(f"{base_url}/v1/chat/completions", payload):
+        if ttft is None: ttft = time.perf_counter() - t0
+        parts.append(delta)
+    return {"ttft_ms": round(ttft * 1000, 1) if ttft is not None else None,
+            "total_ms": round((time.perf_counter() - t0) * 1000, 1),
+            "deltas": len(parts), "chars": len("".join(parts))}
+
+
+def probe_router(requests_n=60, hedge=True):
+    """
+    Three stubs behind LLMRouter: fast with a rare stall, slow, and
+    one that always fails. Returns per-request latencies and router stats.
+    """
+    from llm_router import LLMRouter
+    stubs = [start_stub(first_delay=0.1, token_delay=0.01, jitter=0.05),
+             start_stub(first_delay=0.4, token_delay=0.01, jitter=0.1),
+             start_stub(first_delay=0.1, token_delay=0.01, error_rate=1.0)]
+    router = LLMRouter([url for _, url in stubs], hedge=hedge, hedge_min_s=0.15, cooldown_s=2)
+    payload = {"messages": [{"role": "user", "content": "привіт"}]}
+    ttft = []
+    for i in range(requests_n):
+        fast = stubs[0][0]
+        fast.first_delay = 2.0 if i % 30 == 29 else 0.1  # the fast box stalls now and then
+        t0 = time.perf_counter()
+        for _ in router.stream(payload):
+            ttft.append(time.perf_counter() - t0)
+            break
+    for server, _ in stubs: server.shutdown()
+    router.close()
+    ttft.sort()
+    return {"ttft_p50_ms": round(ttft[len(ttft) // 2] * 1000, 1),
+            "ttft_p95_ms": round(ttft[min(len(ttft) - 1, int(len(ttft) * 0.95))] * 1000, 1),
+            "ttft_max_ms": round(ttft[-1] * 1000, 1), "router": router.stats()}
+
+
+def main(argv=None):
+    ap = argparse.ArgumentParser(description="Stub LLM server with streamed replies")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--reply", default=DEFAULT_REPLY)
+    ap.add_argument("--first-delay", type=float, default=0.3, help="seconds before the first token")
+    ap.add_argument("--token-delay", type=float, default=0.05, help="seconds between tokens")
+    ap.add_argument("--jitter", type=float, default=0.0, help="up to this many extra seconds before the first token")
+    ap.add_argument("--error-rate", type=float, default=0.0, help="share of requests answered with 503")
+    ap.add_argument("--probe", action="store_true", help="start on a free port, measure one stream, exit")
+    ap.add_argument("--router", action="store_true", help="run the multi-endpoint routing probe and exit")
+    ap.add_argument("--no-hedge", action="store_true", help="with --router: disable hedged requests")
+    args = ap.parse_args(argv)
+
+    if args.router:
+        print(json.dumps(probe_router(hedge=not args.no_hedge), ensure_ascii=False, indent=2))
+        return
+
+    server, url = start_stub(0 if args.probe else args.port, args.reply, args.first_delay, args.token_delay,
+                             args.jitter, args.error_rate)
+    if args.probe:
+        print(json.dumps(dict(probe(url), first_delay_ms=args.first_delay * 1000), ensure_ascii=False))
+        server.shutdown()
+        return
+    print(f"LLM stub on {url} (Ctrl+C to stop)")
+    try:
+        while True: time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -24,6 +24,9 @@ def setup_logging():
 
 if __name__ == "__main__":
     setup_logging()
+    # Стартує відлік часу запуску (time-to-window / time-to-first-command)
+    from model_manager import ModelManager
+    models = ModelManager()
     
     print("Starting Petrucha Rebuilt...")
     try:
@@ -35,6 +38,7 @@ if __name__ == "__main__":
         
         w = MainWindow()
         w.show()
+        models.milestone("window")
         
         logging.info("Інтерфейс ініціалізовано успішно")
         sys.exit(app.exec())
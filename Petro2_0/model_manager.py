@@ -0,0 +1,217 @@
+import gc
+import time
+import logging
+import threading
+
+try: import psutil
+except ImportError: psutil = None
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _NoLock:
+    def __enter__(self): return self
+    def __exit__(self, *exc): return False
+
+
+LOADING = "loading"
+READY = "ready"
+FAILED = "failed"
+UNLOADED = "unloaded"
+
+
+def _rss_mb():
+    if not psutil: return None
+    return psutil.Process().memory_info().rss / 2**20
+
+
+class ModelManager:
+    """
+    Singleton that loads heavy resources (Vosk, Silero/torch) on background
+    threads and tracks their readiness, so the window can show immediately.
+    Also logs startup milestones (time-to-window, time-to-first-command).
+
+    Resident models are tracked by approximate size (RSS growth while loading,
+    only recorded when no other model loaded at the same time; with a budget
+    loads run one at a time) and last use. A model loaded with idle_s > 0 is
+    unloaded after that long without use, and a memory budget evicts the least
+    recently used idle models. Callers reload on demand: load() again after UNLOADED.
+    """
+    _instance = None
+
+    def __new__(cls):
+        if cls._instance is None:
+            cls._instance = super(ModelManager, cls).__new__(cls)
+            cls._instance._setup()
+        return cls._instance
+
+    def _setup(self):
+        self.started_at = time.time()
+        self.lock = threading.Lock()
+        self.models = {}
+        self.states = {}
+        self.errors = {}
+        self.events = {}
+        self.listeners = []
+        self.milestones = {}
+        self.idle_s = {}
+        self.last_used = {}
+        self.sizes_mb = {}
+        self.holds = {}
+        self.loading_now = set()
+        self.overlapped = set()  # loads that ran alongside another one: RSS growth is not their own
+        self.load_serial = threading.Lock()  # with a budget, loads run one at a time so sizes are exact
+        self.budget_mb = 0
+        self.check_every = 30
+        self.janitor = None
+
+    def configure(self, budget_mb=0, check_every=30):
+        """budget_mb: total for all resident models (0 = unlimited)."""
+        self.budget_mb = budget_mb
+        self.check_every = check_every
+
+    # --- Loading ---
+    def load(self, name, loader, idle_s=0):
+        """Starts loader() in the background unless it is already loading/ready."""
+        with self.lock:
+            if self.states.get(name) in (LOADING, READY): return
+            self.states[name] = LOADING
+            event = self.events[name] = threading.Event()
+            self.idle_s[name] = idle_s
+            if idle_s and not self.janitor:
+                self.janitor = threading.Thread(target=self._janitor, daemon=True, name="model-janitor")
+                self.janitor.start()
+        self._notify()
+        threading.Thread(target=self._run, args=(name, loader, event), daemon=True, name=f"load-{name}").start()
+
+    def _run(self, name, loader, event):
+        with self.load_serial if self.budget_mb else _NoLock():
+            t0 = time.time()
+            with self.lock:
+                if self.loading_now: self.overlapped |= self.loading_now | {name}
+                self.loading_now.add(name)
+            rss0 = _rss_mb()
+            try:
+                model = loader()
+                rss1 = _rss_mb()
+                error = None
+            except Exception as e:
+                model, error = None, e
+            with self.lock:
+                self.loading_now.discard(name)
+                isolated = name not in self.overlapped
+                self.overlapped.discard(name)
+                # unload() (or a newer load()) while this one ran: the result is stale
+                current = self.events.get(name) is event
+                if current and error is None:
+                    self.models[name] = model
+                    self.states[name] = READY
+                    self.last_used[name] = time.time()
+                    if rss0 is not None and isolated: self.sizes_mb[name] = max(0.0, rss1 - rss0)
+                    else: self.sizes_mb.pop(name, None)
+                elif current:
+                    self.states[name] = FAILED
+                    self.errors[name] = str(error)
+        if not current:
+            model = None
+            gc.collect()
+            LOGGER.info(f"Model '{name}' was unloaded while loading; result dropped")
+        elif error is not None:
+            LOGGER.error(f"Model '{name}' failed to load: {error}")
+        else:
+            size = f"~{self.sizes_mb[name]:.0f} MB" if name in self.sizes_mb else "size unknown, loaded alongside other models"
+            LOGGER.info(f"Model '{name}' ready in {time.time() - t0:.2f}s ({size})")
+            self._enforce_budget(keep=name)
+        event.set()
+        self._notify()
+
+    def get(self, name, timeout=0):
+        """The model if ready; waits up to `timeout` seconds while it is loading."""
+        event = self.events.get(name)
+        if event and timeout: event.wait(timeout)
+        model = self.models.get(name)
+        if model is not None: self.last_used[name] = time.time()
+        return model
+
+    def state(self, name):
+        return self.states.get(name)
+
+    def hold(self, name):
+        """Marks a model in use (e.g. Vosk while listening): never evicted until release()."""
+        with self.lock:
+            self.holds[name] = self.holds.get(name, 0) + 1
+
+    def release(self, name):
+        with self.lock:
+            self.holds[name] = max(0, self.holds.get(name, 0) - 1)
+            self.last_used[name] = time.time()
+
+    def unload(self, name):
+        with self.lock:
+            if name not in self.states: return
+            self.models.pop(name, None)
+            self.states[name] = UNLOADED
+            event = self.events.pop(name, None)
+            self.sizes_mb.pop(name, None)
+        if event: event.set()  # wake get(timeout) waiters; they find no model
+        gc.collect()  # drop reference cycles so the weights are actually freed
+        LOGGER.info(f"Model '{name}' unloaded")
+        self._notify()
+
+    # --- Memory ---
+    def resident_mb(self):
+        return sum(self.sizes_mb.values())
+
+    def _evictable(self, keep=None):
+        """Ready, unheld models other than `keep`, least recently used first."""
+        names = [n for n, st in self.states.items()
+                 if st == READY and n != keep and not self.holds.get(n)]
+        return sorted(names, key=lambda n: self.last_used.get(n, 0))
+
+    def evict_idle(self, now=None):
+        now = now or time.time()
+        for name in self._evictable():
+            idle = self.idle_s.get(name)
+            if idle and now - self.last_used.get(name, now) > idle:
+                LOGGER.info(f"Model '{name}' idle for {idle}s")
+                self.unload(name)
+
+    def _enforce_budget(self, keep=None):
+        if not self.budget_mb: return
+        for name in self._evictable(keep):
+            if self.resident_mb() <= self.budget_mb: return
+            LOGGER.info(f"Model budget {self.budget_mb} MB exceeded ({self.resident_mb():.0f} MB), evicting '{name}'")
+            self.unload(name)
+        if self.resident_mb() > self.budget_mb:
+            LOGGER.warning(f"Models in use exceed the budget: {self.resident_mb():.0f}/{self.budget_mb} MB")
+
+    def _janitor(self):
+        while True:
+            time.sleep(self.check_every)
+            try: self.evict_idle()
+            except Exception as e: LOGGER.error(f"Model janitor error: {e}")
+
+    # --- Reporting ---
+    def add_listener(self, fn):
+        """fn(summary_text) is called from loader threads on every state change."""
+        self.listeners.append(fn)
+        fn(self.summary())
+
+    def summary(self):
+        labels = {LOADING: "завантаження…", READY: "готово", FAILED: "помилка", UNLOADED: "вивантажено"}
+        def label(name, st):
+            size = self.sizes_mb.get(name)
+            return f"{name}: {labels[st]}" + (f" ({size:.0f} MB)" if st == READY and size else "")
+        return " | ".join(label(name, st) for name, st in sorted(self.states.items()))
+
+    def _notify(self):
+        text = self.summary()
+        for fn in list(self.listeners):
+            try: fn(text)
+            except Exception as e: LOGGER.error(f"Model listener error: {e}")
+
+    def milestone(self, name):
+        """Logs seconds since startup the first time `name` is reached."""
+        if name in self.milestones: return
+        self.milestones[name] = time.time() - self.started_at
+        LOGGER.info(f"Startup milestone '{name}': {self.milestones[name]:.2f}s")
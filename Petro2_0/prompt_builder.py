@@ -0,0 +1,93 @@
+import math
+import logging
+import threading
+
+LOGGER = logging.getLogger(__name__)
+
+MESSAGE_OVERHEAD = 4  # role/separator tokens the chat template adds per message
+
+
+def estimate_tokens(text):
+    """Rough token count: ~3 characters per token for mixed Ukrainian/English text."""
+    return math.ceil(len(text or "") / 3)
+
+
+def clip(text, max_tokens):
+    """Shortens text to about max_tokens; the same input always gives the same output."""
+    if estimate_tokens(text) <= max_tokens: return text
+    return text[:max_tokens * 3].rstrip() + " …"
+
+
+def to_gemini(messages):
+    """OpenAI-style messages -> Gemini generateContent payload (systemInstruction + contents)."""
+    system = [m["content"] for m in messages if m["role"] == "system"]
+    contents = [{"role": "model" if m["role"] == "assistant" else "user", "parts": [{"text": m["content"]}]}
+                for m in messages if m["role"] != "system"]
+    payload = {"contents": contents}
+    if system: payload["systemInstruction"] = {"parts": [{"text": "\n".join(system)}]}
+    return payload
+
+
+class PromptBuilder:
+    """
+    Builds chat `messages` for the LLM backends:
+      system prompt (fixed) -> history turns -> retrieved context + question.
+    Everything that changes per request goes into the last message, so the
+    system prompt and history form a prefix that servers with prompt caching
+    (llama.cpp, LM Studio) can reuse between turns.
+
+    The history window is token-budgeted. Long old turns are clipped, and
+    when the window overflows the oldest turns are dropped down to
+    `low_water` of the budget in one step. The window start then stays put
+    for the next several turns instead of sliding (and invalidating the
+    cached prefix) on every request.
+    """
+    def __init__(self, system, budget=3000, turn_tokens=400, low_water=0.6):
+        self.system = system
+        self.budget = budget
+        self.turn_tokens = turn_tokens
+        self.low_water = low_water
+        self.lock = threading.Lock()
+        self.anchor = None  # history entry the current window starts at
+        self.trims = 0
+
+    def build(self, history, text, context="", system=None):
+        history = list(history)
+        # The caller may already have recorded this question as the last user turn
+        if history and history[-1]["role"] == "user" and history[-1]["content"] == text: history.pop()
+        system = system or self.system
+        if context: context = clip(context, self.budget // 2)
+        final = f"{context}\n\n{text}" if context else text
+        left = self.budget - estimate_tokens(system) - estimate_tokens(final) - 2 * MESSAGE_OVERHEAD
+        messages = [{"role": "system", "content": system}]
+        for m in self._window(history, left):
+            if m["role"] == "assistant" and len(messages) == 1: continue  # the conversation starts with the user
+            self._append(messages, m["role"], clip(m["content"], self.turn_tokens))
+        self._append(messages, "user", final)
+        LOGGER.debug(f"Prompt: {len(messages)} messages, ~{self.tokens(messages)} tokens")
+        return messages
+
+    @staticmethod
+    def _append(messages, role, content):
+        if messages[-1]["role"] == role:
+            # Unanswered turns (fast commands) would break user/assistant alternation
+            messages[-1] = {"role": role, "content": f"{messages[-1]['content']}\n{content}"}
+        else:
+            messages.append({"role": role, "content": content})
+
+    def tokens(self, messages):
+        return sum(estimate_tokens(m["content"]) + MESSAGE_OVERHEAD for m in messages)
+
+    def _cost(self, text):
+        return estimate_tokens(clip(text, self.turn_tokens)) + MESSAGE_OVERHEAD
+
+    def _window(self, history, budget):
+        with self.lock:
+            start = next((i for i, m in enumerate(history) if m is self.anchor), 0)
+            cost = [self._cost(m["content"]) for m in history]
+            if sum(cost[start:]) > budget:
+                while start < len(history) and sum(cost[start:]) > budget * self.low_water: start += 1
+                self.trims += 1
+                LOGGER.info(f"Prompt history trimmed to {len(history) - start} turns (trim #{self.trims})")
+            self.anchor = history[start] if start < len(history) else None
+            return history[start:]
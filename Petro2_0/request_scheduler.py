@@ -0,0 +1,126 @@
+import time
+import logging
+import itertools
+import threading
+from collections import deque
+
+LOGGER = logging.getLogger(__name__)
+
+
+class Request:
+    """One utterance: id, deadline, cancellation flag and per-stage timings."""
+    def __init__(self, rid, text, source, deadline_s):
+        self.id = rid
+        self.text = text
+        self.source = source
+        self.created = time.perf_counter()
+        self.deadline = time.monotonic() + deadline_s
+        self.cancel_event = threading.Event()
+        self.reason = None
+        self.last_mark = self.created
+        self.stages = {}
+
+    def cancel(self, reason="superseded"):
+        if not self.cancel_event.is_set(): self.reason = reason
+        self.cancel_event.set()
+
+    @property
+    def cancelled(self):
+        if not self.cancel_event.is_set() and time.monotonic() > self.deadline: self.cancel("deadline")
+        return self.cancel_event.is_set()
+
+    def remaining(self):
+        """Seconds left before the deadline (0 when past it)."""
+        return max(0.0, self.deadline - time.monotonic())
+
+    def mark(self, stage):
+        """Time spent since the previous mark is attributed to `stage`."""
+        now = time.perf_counter()
+        self.stages[stage] = self.stages.get(stage, 0.0) + (now - self.last_mark)
+        self.last_mark = now
+
+
+class RequestScheduler:
+    """
+    Runs utterances on a bounded worker pool. Every request gets an id and a
+    deadline; a newer utterance cancels the older ones, and the handler checks
+    current().cancelled before and during slow stages (search, LLM). Fast
+    commands still run: only the slow work of a superseded request is dropped.
+    """
+    def __init__(self, handler, workers=2, max_queue=8, deadline_s=30, report_every=50):
+        self.handler = handler
+        self.workers = workers
+        self.max_queue = max_queue
+        self.deadline_s = deadline_s
+        self.report_every = report_every
+        self.cond = threading.Condition()
+        self.queue = deque()
+        self.active = {}  # id -> Request
+        self.ids = itertools.count(1)
+        self.local = threading.local()
+        self.threads = []
+        self.counters = {"submitted": 0, "completed": 0, "superseded": 0, "deadline": 0, "overflow": 0}
+        self.timings = {}  # stage -> deque of seconds
+
+    def submit(self, text, source="voice"):
+        req = Request(next(self.ids), text, source, self.deadline_s)
+        with self.cond:
+            for old in list(self.queue) + list(self.active.values()):
+                if not old.cancel_event.is_set():
+                    old.cancel("superseded")
+                    self.counters["superseded"] += 1
+            if len(self.queue) >= self.max_queue:
+                # Workers are stuck: the oldest waiting utterance is dropped entirely
+                self.queue.popleft()
+                self.counters["overflow"] += 1
+            self.queue.append(req)
+            self.counters["submitted"] += 1
+            if len(self.threads) < self.workers:
+                t = threading.Thread(target=self._worker, daemon=True, name=f"request-{len(self.threads)}")
+                self.threads.append(t)
+                t.start()
+            self.cond.notify()
+        LOGGER.info(f"Request #{req.id} ({source}): {text}")
+        return req
+
+    def current(self):
+        """The request handled by the calling worker thread, or None."""
+        return getattr(self.local, "request", None)
+
+    def _worker(self):
+        while True:
+            with self.cond:
+                while not self.queue: self.cond.wait()
+                req = self.queue.popleft()
+                self.active[req.id] = req
+            req.mark("queue")
+            self.local.request = req
+            try:
+                self.handler(req.text)
+            except Exception as e:
+                LOGGER.error(f"Request #{req.id} failed: {e}")
+            finally:
+                self.local.request = None
+                self._finish(req)
+
+    def _finish(self, req):
+        total = time.perf_counter() - req.created
+        with self.cond:
+            self.active.pop(req.id, None)
+            self.counters["completed"] += 1
+            if req.reason == "deadline": self.counters["deadline"] += 1
+            for stage, dt in list(req.stages.items()) + [("total", total)]:
+                self.timings.setdefault(stage, deque(maxlen=200)).append(dt)
+            done = self.counters["completed"]
+        if req.reason: LOGGER.info(f"Request #{req.id} {req.reason} after {total:.2f}s")
+        if done % self.report_every == 0: LOGGER.info(f"Requests: {self.stats()}")
+
+    def stats(self):
+        """Queue depth, in-flight count, counters and per-stage p50/p95 (ms)."""
+        with self.cond:
+            out = dict(self.counters, queue_depth=len(self.queue), in_flight=len(self.active))
+            timings = {k: sorted(v) for k, v in self.timings.items()}
+        for stage, vals in timings.items():
+            out[f"{stage}_p50_ms"] = round(vals[len(vals) // 2] * 1000, 1)
+            out[f"{stage}_p95_ms"] = round(vals[min(len(vals) - 1, int(len(vals) * 0.95))] * 1000, 1)
+        return out
@@ -0,0 +1,183 @@
+"""
+Screen capture for vision queries.
+
+Capture, change detection, downscale and JPEG encoding run on one worker
+thread. A cheap box-reduced copy of the frame is cut into a grid of tiles
+and each tile is hashed; if no tile (or at most `max_changed_tiles`) changed
+since the last encoded frame and that frame is younger than `max_age_s`, its
+JPEG is reused as is. JPEG quality, then resolution, adapt to a byte budget,
+starting from whatever fitted last time so usually one encode is enough.
+
+The frame source is any callable returning a PIL image, so the pipeline can
+be benchmarked on synthetic frames without a display (bench_capture.py).
+"""
+import time
+import base64
+import hashlib
+import logging
+import threading
+from io import BytesIO
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+import numpy as np
+
+# Optional imports
+try: from PIL import Image
+except ImportError: Image = None
+try: import pyautogui
+except ImportError: pyautogui = None
+try: import mss
+except ImportError: mss = None
+
+LOGGER = logging.getLogger(__name__)
+
+
+def pyautogui_source():
+    return pyautogui.screenshot()
+
+
+class MssSource:
+    """Primary monitor via mss: a fraction of pyautogui's capture time."""
+    def __init__(self, monitor=1):
+        self.monitor = monitor
+        self.sct = None  # created on the capture worker; mss handles are per thread
+
+    def __call__(self):
+        if self.sct is None: self.sct = mss.mss()
+        shot = self.sct.grab(self.sct.monitors[self.monitor])
+        return Image.frombytes("RGB", shot.size, shot.bgra, "raw", "BGRX")
+
+
+def default_source():
+    if mss and Image: return MssSource()
+    if pyautogui:
+        LOGGER.warning("mss is not installed: screenshots use the slower pyautogui capture (pip install mss)")
+        return pyautogui_source
+    LOGGER.warning("No screen capture backend (mss or pyautogui): vision queries get no screenshot")
+    return None
+
+
+class ScreenCapture:
+    def __init__(self, source=None, max_side=1024, target_bytes=200_000, grid=16, max_changed_tiles=0,
+                 max_age_s=10, min_quality=40, max_quality=80, report_every=20):
+        self.source = source or default_source()
+        self.max_side = max_side
+        self.target_bytes = target_bytes
+        self.grid = grid
+        self.max_changed_tiles = max_changed_tiles  # changed tiles still treated as "same screen"
+        self.max_age_s = max_age_s  # older reference frames are re-encoded even if they look unchanged
+        self.min_quality = min_quality
+        self.max_quality = max_quality
+        self.report_every = report_every
+        self.quality = max_quality
+        self.scale = 1.0  # < 1 once quality alone could not meet the budget
+        self.pool = ThreadPoolExecutor(max_workers=1, thread_name_prefix="screen")
+        self.lock = threading.Lock()
+        self.pending = None  # in-flight capture, shared by concurrent callers
+        self.last = None  # (tile hashes, jpeg size, base64, monotonic time) of the last encoded frame
+        self.counters = {"captures": 0, "reused": 0, "encodes": 0, "errors": 0}
+        self.timings = {}  # stage -> deque of ms
+        self.last_info = {}
+
+    def grab_base64(self, timeout=10):
+        """Base64 JPEG of the current screen, or None if there is no source or capture failed."""
+        if not self.source or not Image: return None
+        with self.lock:
+            fut = self.pending
+            if fut is None or fut.done(): fut = self.pending = self.pool.submit(self._capture)
+        try:
+            return fut.result(timeout)
+        except Exception as e:
+            LOGGER.error(f"Screenshot error: {e}")
+            with self.lock: self.counters["errors"] += 1
+            return None
+
+    def _capture(self):
+        t0 = time.perf_counter()
+        img = self.source()
+        t1 = time.perf_counter()
+        # Box-reduced copy (~500 px) is enough to notice a change and costs a few ms,
+        # so an unchanged screen skips the resize and the encode
+        tiles = self._tile_hashes(img.reduce(max(1, max(img.size) // 512)))
+        t2 = time.perf_counter()
+        stages = {"capture": t1 - t0, "hash": t2 - t1}
+
+        last = self.last
+        if last and time.monotonic() - last[3] > self.max_age_s: last = None
+        changed = self._changed(last[0], tiles) if last else self.grid ** 2
+        if changed <= self.max_changed_tiles:
+            reused = True
+            size, b64 = last[1], last[2]
+        else:
+            reused = False
+            side = max(64, int(self.max_side * self.scale))
+            if max(img.size) > side:
+                k = side / max(img.size)
+                # Same filter as thumbnail(), but leaves the source frame untouched
+                img = img.resize((max(1, round(img.width * k)), max(1, round(img.height * k))), Image.BICUBIC, reducing_gap=2.0)
+            img = img.convert("RGB")  # JPEG has no alpha
+            t3 = time.perf_counter()
+            data, quality, dims = self._encode(img)
+            stages.update(resize=t3 - t2, encode=time.perf_counter() - t3)
+            size, b64 = len(data), base64.b64encode(data).decode("utf-8")
+            # Reference stays the encoded frame, so small changes cannot pile up unnoticed
+            self.last = (tiles, size, b64, time.monotonic())
+        self._record(stages, reused, dict(bytes=size, payload_bytes=len(b64), changed=changed,
+                                          size=self.last_info.get("size") if reused else f"{dims[0]}x{dims[1]}",
+                                          quality=self.last_info.get("quality") if reused else quality))
+        return b64
+
+    def _tile_hashes(self, img):
+        arr = np.asarray(img)
+        h, w = arr.shape[:2]
+        ys = [h * i // self.grid for i in range(self.grid + 1)]
+        xs = [w * i // self.grid for i in range(self.grid + 1)]
+        return img.size, [hashlib.blake2b(arr[ys[i]:ys[i + 1], xs[j]:xs[j + 1]].tobytes(), digest_size=8).digest()
+                          for i in range(self.grid) for j in range(self.grid)]
+
+    @staticmethod
+    def _changed(prev, cur):
+        """Number of tiles that differ; a different frame size counts as a full change."""
+        if prev[0] != cur[0]: return len(cur[1])
+        return sum(a != b for a, b in zip(prev[1], cur[1]))
+
+    def _encode(self, img):
+        """JPEG within target_bytes: lower the quality first, then the resolution."""
+        q = self.quality
+        for _ in range(8):
+            buf = BytesIO()
+            img.save(buf, format="JPEG", quality=q)
+            data = buf.getvalue()
+            if len(data) <= self.target_bytes: break
+            if q > self.min_quality:
+                q = max(self.min_quality, q - 15)
+            else:
+                self.scale = max(0.25, self.scale * 0.75)
+                img = img.resize((max(1, int(img.width * 0.75)), max(1, int(img.height * 0.75))), Image.BILINEAR)
+        used = q
+        # Plenty of headroom: spend it on quality, then resolution, next time
+        if len(data) < self.target_bytes // 2:
+            if q < self.max_quality: q = min(self.max_quality, q + 10)
+            elif self.scale < 1.0: self.scale = min(1.0, self.scale / 0.75)
+        self.quality = q
+        return data, used, img.size
+
+    def _record(self, stages, reused, info):
+        with self.lock:
+            self.counters["captures"] += 1
+            self.counters["reused" if reused else "encodes"] += 1
+            for stage, dt in stages.items():
+                self.timings.setdefault(stage, deque(maxlen=100)).append(dt * 1000)
+            self.last_info = info
+            report = self.counters["captures"] % self.report_every == 0
+        LOGGER.info(f"Screenshot: {'reused' if reused else 'encoded'} {info} "
+                    + " ".join(f"{k}={v * 1000:.0f}ms" for k, v in stages.items()))
+        if report: LOGGER.info(f"Screen capture: {self.stats()}")
+
+    def stats(self):
+        """Counters, p50 ms per stage, and size/quality of the last frame."""
+        with self.lock:
+            out = dict(self.counters, scale=round(self.scale, 2), next_quality=self.quality, last=dict(self.last_info))
+            for stage, vals in self.timings.items():
+                out[f"{stage}_p50_ms"] = round(sorted(vals)[len(vals) // 2], 1)
+        return out
@@ -0,0 +1,419 @@
+import json
+import time
+import wave
+import logging
+import threading
+from collections import deque
+
+import numpy as np
+import vosk
+
+LOGGER = logging.getLogger(__name__)
+
+SAMPLE_RATE = 16000
+WAKE_ALIASES = ["петро", "петруча", "асистент", "привіт"]
+
+
+class AudioRingBuffer:
+    """
+    Preallocated single-producer / multi-consumer ring of int16 samples.
+    The PortAudio callback only copies into the ring and bumps a counter, so
+    the audio thread never allocates a block or waits on a consumer. Each
+    consumer has its own RingReader; one that falls a full ring behind loses
+    the oldest audio and records an overrun.
+    """
+    def __init__(self, seconds=10, rate=SAMPLE_RATE):
+        self.capacity = int(seconds * rate)
+        self.buf = np.zeros(self.capacity, dtype=np.int16)
+        self.written = 0  # total samples ever written
+        self.cond = threading.Condition()
+
+    def write(self, indata):
+        x = np.frombuffer(indata, dtype=np.int16)
+        n = len(x)
+        if n > self.capacity:
+            self.written += n - self.capacity
+            x, n = x[-self.capacity:], self.capacity
+        start = self.written % self.capacity
+        first = min(n, self.capacity - start)
+        self.buf[start:start + first] = x[:first]
+        if first < n: self.buf[:n - first] = x[first:]
+        self.written += n
+        # Wake readers only if nobody holds the lock; they also poll
+        if self.cond.acquire(blocking=False):
+            self.cond.notify_all()
+            self.cond.release()
+
+    def copy_out(self, pos, out):
+        """Copies len(out) samples starting at absolute position pos."""
+        n = len(out)
+        start = pos % self.capacity
+        first = min(n, self.capacity - start)
+        out[:first] = self.buf[start:start + first]
+        if first < n: out[first:] = self.buf[:n - first]
+
+    def reader(self, block=4000):
+        return RingReader(self, block)
+
+
+class RingReader:
+    """Sequential consumer of an AudioRingBuffer, in fixed-size blocks."""
+    POLL = 0.05
+
+    def __init__(self, ring, block):
+        self.ring = ring
+        self.block = block
+        self.pos = ring.written
+        self.out = np.empty(block, dtype=np.int16)
+        self.overruns = 0
+        self.overrun_samples = 0
+
+    def read(self, timeout=1.0):
+        """Next block (a reused array, valid until the next read) or None on timeout."""
+        ring = self.ring
+        deadline = time.monotonic() + timeout
+        while ring.written - self.pos < self.block:
+            left = deadline - time.monotonic()
+            if left <= 0: return None
+            with ring.cond: ring.cond.wait(min(left, self.POLL))
+        while True:
+            lag = ring.written - self.pos
+            if lag > ring.capacity - self.block:
+                # Lapped by the producer: skip to the newest complete block
+                skipped = lag - self.block
+                self.pos += skipped
+                self.overruns += 1
+                self.overrun_samples += skipped
+                LOGGER.warning(f"Audio ring overrun: {skipped / SAMPLE_RATE:.2f}s dropped")
+            ring.copy_out(self.pos, self.out)
+            # Producer may have wrapped over us while copying
+            if ring.written - self.pos <= ring.capacity: break
+        self.pos += self.block
+        return self.out
+
+
+class LevelMeter:
+    """Mic level for the UI, computed from the ring at most `hz` times per second."""
+    def __init__(self, ring, emit, hz=15):
+        self.ring = ring
+        self.emit = emit
+        self.interval = 1.0 / hz
+        self.window = np.empty(SAMPLE_RATE // hz, dtype=np.int16)
+        self.last = 0.0
+
+    def update(self):
+        now = time.monotonic()
+        if now - self.last < self.interval or self.ring.written < len(self.window): return
+        self.last = now
+        self.ring.copy_out(self.ring.written - len(self.window), self.window)
+        rms = float(np.sqrt(np.mean(self.window.astype(np.float32) ** 2)))
+        # Same scale as the old norm(4000-sample block) / 300
+        self.emit(min(int(rms * 63.25 / 300), 100))
+
+
+class AudioRecorder(threading.Thread):
+    """Optional consumer that dumps the mic stream to a WAV file."""
+    def __init__(self, ring, path, stop_event):
+        super().__init__(daemon=True)
+        self.reader = ring.reader(4000)
+        self.path = path
+        self.stop_event = stop_event
+
+    def run(self):
+        try:
+            with wave.open(self.path, "wb") as wf:
+                wf.setnchannels(1)
+                wf.setsampwidth(2)
+                wf.setframerate(SAMPLE_RATE)
+                while not self.stop_event.is_set():
+                    block = self.reader.read(timeout=0.5)
+                    if block is not None: wf.writeframes(block.tobytes())
+        except Exception as e:
+            LOGGER.error(f"Recorder error: {e}")
+
+
+class ListenStats:
+    """
+    Decoder cost counters of the listen loop, logged periodically.
+    CPU is the listen thread's own time (time.thread_time), split into
+    idle (wake gate only) and active (full recognizer) periods.
+    """
+    def __init__(self, report_every=60):
+        self.report_every = report_every
+        self.last_report = time.time()
+        self.idle_audio_s = self.idle_cpu_s = 0.0
+        self.active_audio_s = self.active_cpu_s = 0.0
+        self.gate_decode_s = self.full_decode_s = 0.0
+        self.vad = None
+        self.reader = None
+
+    def add(self, audio_s, cpu_s, idle):
+        if idle:
+            self.idle_audio_s += audio_s
+            self.idle_cpu_s += cpu_s
+        else:
+            self.active_audio_s += audio_s
+            self.active_cpu_s += cpu_s
+
+    def snapshot(self):
+        def pct(cpu, audio): return round(cpu / audio * 100, 2) if audio else 0.0
+        audio = self.idle_audio_s + self.active_audio_s
+        return {
+            "audio_s": round(audio, 1),
+            "idle_audio_s": round(self.idle_audio_s, 1),
+            "idle_cpu_pct": pct(self.idle_cpu_s, self.idle_audio_s),
+            "active_cpu_pct": pct(self.active_cpu_s, self.active_audio_s),
+            "gate_rtf": round(self.gate_decode_s / audio, 4) if audio else 0.0,
+            "full_rtf": round(self.full_decode_s / audio, 4) if audio else 0.0,
+            "vad_dropped_s": round(self.vad.dropped_s, 1) if self.vad else None,
+            "vad_dropped_pct": round(self.vad.dropped_s / audio * 100, 1) if self.vad and audio else None,
+            "ring_overruns": self.reader.overruns if self.reader else None,
+            "ring_overrun_s": round(self.reader.overrun_samples / SAMPLE_RATE, 2) if self.reader else None,
+        }
+
+    def maybe_report(self, force=False):
+        if force or time.time() - self.last_report >= self.report_every:
+            self.last_report = time.time()
+            LOGGER.info(f"Listen stats: {self.snapshot()}")
+
+
+class VoiceActivityDetector:
+    """
+    Energy + spectral flatness VAD over 25 ms frames, with hangover blocks and
+    a noise floor that follows the room. Blocks judged silent never reach a
+    recognizer; the end of speech is reported so the recognizer can be flushed.
+    """
+    FRAME = 400  # 25 ms @ 16 kHz
+
+    def __init__(self, margin_db=10.0, flatness_max=0.45, min_speech_frames=2, hangover_blocks=3, preroll_blocks=1):
+        self.margin_db = margin_db
+        self.flatness_max = flatness_max
+        self.min_speech_frames = min_speech_frames
+        self.hangover_blocks = hangover_blocks
+        self.preroll = deque(maxlen=preroll_blocks)
+        self.window = np.hanning(self.FRAME).astype(np.float32)
+        self.noise_db = None
+        self.hang = 0
+        self.in_speech = False
+        self.total_s = self.dropped_s = 0.0
+
+    def is_speech(self, data) -> bool:
+        x = np.frombuffer(data, dtype=np.int16).astype(np.float32)
+        n = len(x) // self.FRAME * self.FRAME
+        if not n: return False
+        frames = x[:n].reshape(-1, self.FRAME)
+        energy_db = 10 * np.log10(np.mean(frames ** 2, axis=1) + 1e-9)
+        spec = np.abs(np.fft.rfft(frames * self.window, axis=1)) ** 2 + 1e-12
+        # Geometric / arithmetic mean: ~1 for noise, low for voiced speech
+        flatness = np.exp(np.mean(np.log(spec), axis=1)) / np.mean(spec, axis=1)
+
+        quiet_db = float(np.percentile(energy_db, 10))
+        if self.noise_db is None: self.noise_db = quiet_db
+        voiced = (energy_db > self.noise_db + self.margin_db) & (flatness < self.flatness_max)
+        speech = int(np.count_nonzero(voiced)) >= self.min_speech_frames
+
+        # Adapt: drop at once when the room gets quieter, rise slowly on non-speech
+        self.noise_db = min(self.noise_db, quiet_db)
+        if not speech: self.noise_db = 0.95 * self.noise_db + 0.05 * float(np.median(energy_db))
+        return speech
+
+    def process(self, data):
+        """Returns (blocks to decode, speech_ended)."""
+        dur = len(data) / 2 / SAMPLE_RATE
+        self.total_s += dur
+        if self.is_speech(data):
+            self.hang = self.hangover_blocks
+            blocks = [data]
+            if not self.in_speech:
+                # Speech onset may start in the block before
+                blocks = list(self.preroll) + blocks
+                self.dropped_s -= sum(len(b) for b in self.preroll) / 2 / SAMPLE_RATE
+                self.preroll.clear()
+                self.in_speech = True
+            return blocks, False
+        if self.in_speech:
+            self.hang -= 1
+            if self.hang > 0: return [data], False
+            self.in_speech = False
+            return [data], True
+        self.preroll.append(data)
+        self.dropped_s += dur
+        return [], False
+
+
+class WakeGate:
+    """
+    Keyword spotter in front of the full recognizer: a tiny grammar with only
+    the wake aliases. Keeps a short pre-roll so the words said right after
+    the alias reach the full recognizer too.
+    """
+    def __init__(self, model, stats, preroll_blocks=8):
+        grammar = WAKE_ALIASES + ["[unk]"]
+        self.rec = vosk.KaldiRecognizer(model, SAMPLE_RATE, json.dumps(grammar, ensure_ascii=False))
+        self.preroll = deque(maxlen=preroll_blocks)
+        self.stats = stats
+
+    def feed(self, data) -> bool:
+        """True once an alias is heard (in a partial or a final result)."""
+        self.preroll.append(data)
+        t0 = time.perf_counter()
+        if self.rec.AcceptWaveform(data):
+            text, final = json.loads(self.rec.Result()).get("text", ""), True
+        else:
+            text, final = json.loads(self.rec.PartialResult()).get("partial", ""), False
+        self.stats.gate_decode_s += time.perf_counter() - t0
+        hit = any(a in text for a in WAKE_ALIASES)
+        if hit and not final: self.rec.Reset()
+        return hit
+
+    def take_preroll(self):
+        blocks = list(self.preroll)
+        self.reset()
+        return blocks
+
+    def reset(self):
+        self.preroll.clear()
+        self.rec.Reset()
+
+
+class VoskSession:
+    """
+    Decoder state of one listening session: the free-form recognizer, the
+    optional command-grammar recognizer fed first, and partial-result tracking.
+    Finished utterances are handed back to the core.
+    """
+    def __init__(self, core, stats):
+        self.core = core
+        self.cfg = core.cfg
+        self.stats = stats
+        self.rec = vosk.KaldiRecognizer(core.vosk_model, SAMPLE_RATE)
+        self.cmd_rec = None
+        self.grammar_version = None
+        self.pending = deque(maxlen=240)  # audio of the current utterance (~60 s) for free-form replay
+        self.partial_mode = self.cfg.get("partial_commands", False)
+        self.stable_needed = self.cfg.get("partial_stable_blocks", 2)
+        self.last_partial, self.stable, self.fired = "", 0, None
+        self.barge_in = self.cfg.get("tts_barge_in", False)
+
+    def _active(self):
+        if self.cfg.get("command_grammar", False):
+            # Grammar follows the config: rebuilt when phrases change
+            if self.grammar_version != self.cfg.phrases_version:
+                self.cmd_rec = self._make_command_recognizer()
+                self.grammar_version = self.cfg.phrases_version
+                self.pending.clear()
+            if self.cmd_rec: return self.cmd_rec
+        return self.rec
+
+    def _make_command_recognizer(self):
+        """Small-vocabulary recognizer restricted to the configured voice phrases."""
+        grammar = self.core.matcher.grammar_phrases() + WAKE_ALIASES + ["[unk]"]
+        try:
+            return vosk.KaldiRecognizer(self.core.vosk_model, SAMPLE_RATE, json.dumps(grammar, ensure_ascii=False))
+        except Exception as e:
+            LOGGER.error(f"Command grammar failed, using free-form only: {e}")
+            return None
+
+    def feed(self, data):
+        active = self._active()
+        if active is self.cmd_rec: self.pending.append(data)
+        t0 = time.perf_counter()
+        final = active.AcceptWaveform(data)
+        self.stats.full_decode_s += time.perf_counter() - t0
+        if final:
+            self._on_final(json.loads(active.Result()).get("text", ""), active)
+            return
+        watch = self.barge_in and self.core.tts.is_speaking()
+        if not watch and not (self.partial_mode and self.fired is None): return
+        p = json.loads(active.PartialResult()).get("partial", "")
+        # Barge-in needs the wake word, so the assistant's own voice cannot cancel it
+        if watch and p.split()[:1] and p.split()[0] in WAKE_ALIASES: self.core.barge_in()
+        if self.partial_mode and self.fired is None:
+            if p and p == self.last_partial: self.stable += 1
+            else: self.last_partial, self.stable = p, 1
+            if p and self.stable >= self.stable_needed:
+                self.fired = self.core._try_partial_command(p)
+
+    def flush(self):
+        """Ends the current utterance now (e.g. the wake window closed)."""
+        active = self._active()
+        self._on_final(json.loads(active.FinalResult()).get("text", ""), active)
+
+    def _on_final(self, text, active):
+        if active is self.cmd_rec:
+            blocks = list(self.pending)
+            self.pending.clear()
+            if not self.core._is_command_text(text):
+                text = self._decode_free_form(blocks)
+        if text and not self.core._is_partial_duplicate(text, self.fired):
+            self.core._check_wake_word_and_process(text)
+        self.last_partial, self.stable, self.fired = "", 0, None
+
+    def _decode_free_form(self, blocks):
+        """Replays an utterance the grammar could not explain through the full model."""
+        t0 = time.perf_counter()
+        texts = []
+        for b in blocks:
+            if self.rec.AcceptWaveform(b):
+                texts.append(json.loads(self.rec.Result()).get("text", ""))
+        texts.append(json.loads(self.rec.FinalResult()).get("text", ""))
+        self.stats.full_decode_s += time.perf_counter() - t0
+        return " ".join(t for t in texts if t)
+
+
+class ListenPipeline:
+    """
+    Per-block path of the Vosk listen loop: optional VAD, optional wake gate,
+    then the VoskSession. Full decoding runs only after an alias or inside the
+    conversation window.
+    """
+    def __init__(self, core):
+        self.core = core
+        self.cfg = core.cfg
+        self.stats = ListenStats()
+        self.session = VoskSession(core, self.stats)
+        use_gate = self.cfg.get("wake_word_enabled", True) and self.cfg.get("wake_gate", False)
+        self.gate = WakeGate(core.vosk_model, self.stats) if use_gate else None
+        self.vad = VoiceActivityDetector() if self.cfg.get("vad_enabled", False) else None
+        self.stats.vad = self.vad
+        self.awake_until, self.was_awake = 0, False
+
+    def push(self, data):
+        cpu0 = time.thread_time()
+        if self.vad: blocks, ended = self.vad.process(data)
+        else: blocks, ended = [data], False
+        decoded = False
+        for block in blocks:
+            decoded = self._route(block) or decoded
+        if ended:
+            if self._awake(): self.session.flush()
+            elif self.gate: self.gate.reset()
+        self.stats.add(len(data) / 2 / SAMPLE_RATE, time.thread_time() - cpu0, idle=not decoded)
+        self.stats.maybe_report()
+
+    def close(self):
+        self.stats.maybe_report(force=True)
+        return self.stats.snapshot()
+
+    def _awake(self):
+        if not self.gate: return True
+        window_end = self.core.last_interaction_time + self.core.active_conversation_timeout
+        return time.time() < max(self.awake_until, window_end)
+
+    def _route(self, data) -> bool:
+        """Feeds one block; True if the full recognizer decoded it."""
+        if self._awake():
+            self.was_awake = True
+            self.session.feed(data)
+            return True
+        if self.was_awake:
+            self.session.flush()
+            self.gate.reset()
+            self.was_awake = False
+        if self.gate.feed(data):
+            self.core.barge_in()
+            self.awake_until = time.time() + self.core.active_conversation_timeout
+            self.was_awake = True
+            for block in self.gate.take_preroll(): self.session.feed(block)
+            return True
+        return False
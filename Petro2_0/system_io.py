@@ -5,13 +5,12 @@ import webbrowser
 import logging
 import shutil
 import time
-import requests
 import glob
 import json
-import base64
 from datetime import datetime
 from config import Config
-from io import BytesIO
+from http_client import HttpClient
+from screen_capture import ScreenCapture
 
 # Optional imports
 try: import pyautogui
@@ -33,6 +32,8 @@ class SystemIO:
     """
     def __init__(self):
         self.cfg = Config()
+        self.http = HttpClient()
+        self.screen = None  # ScreenCapture, created on the first vision query
         self.system = platform.system().lower()
         self.home_dir = os.path.expanduser("~")
         self.notes_dir = os.path.join(self.home_dir, "Documents", "Petrucha_Notes")
@@ -78,25 +79,13 @@ class SystemIO:
     # --- Vision Helpers ---
     def get_screenshot_base64(self) -> str:
         """Returns optimized screen image as base64 string for Gemini."""
-        if not pyautogui: return None
-        try:
-            img = pyautogui.screenshot()
-            
-            # OPTIMIZATION: Resize if image is huge to prevent API 503 errors
-            # Max dimension 1024px is usually enough for LLM to read text
-            img.thumbnail((1024, 1024))
-            
-            # Convert to RGB (JPEG doesn't support Alpha channel)
-            img = img.convert("RGB")
-            
-            buffered = BytesIO()
-            # Save as JPEG with compression
-            img.save(buffered, format="JPEG", quality=80)
-            
-            return base64.b64encode(buffered.getvalue()).decode("utf-8")
-        except Exception as e:
-            LOGGER.error(f"Screenshot error: {e}")
-            return None
+        if self.screen is None:
+            # Capture/encode run on the ScreenCapture worker; an unchanged screen reuses the last JPEG
+            self.screen = ScreenCapture(max_side=self.cfg.get("screen_max_side", 1024),
+                                        target_bytes=self.cfg.get("screen_target_kb", 200) * 1024,
+                                        max_changed_tiles=self.cfg.get("screen_changed_tiles", 0),
+                                        max_age_s=self.cfg.get("screen_max_age_s", 10))
+        return self.screen.grab_base64()
 
     # --- Entries (Apps, Files, Folders, Sites) ---
     def open_entry(self, entry_id: str) -> str:
@@ -295,9 +284,9 @@ class SystemIO:
                 if params.get("method", "GET") == "GET":
                     sep = "&" if "?" in url else "?"
                     if payload: url += f"{sep}{payload}"
-                    requests.get(url, timeout=5)
+                    self.http.get("iot", url)
                 else:
-                    requests.post(url, data=payload, timeout=5)
+                    self.http.post("iot", url, data=payload)
                 return f"IoT: {dev['display_name']} -> {action['name']}"
 
             elif ctype == "MQTT" and publish:
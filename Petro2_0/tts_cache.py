@@ -0,0 +1,150 @@
+import os
+import json
+import zlib
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TTSCache:
+    """
+    Content-addressed cache of synthesized speech.
+    Key: (engine, model variant, speaker, sample rate, text). Value: (fmt, rate, payload) where
+    fmt is "pcm16" (mono int16) or "mp3". Two tiers: an in-memory LRU and a
+    size-capped directory of zlib-compressed files (oldest evicted first).
+    """
+    def __init__(self, directory="tts_cache", memory_mb=32, disk_mb=200, report_every=100):
+        self.directory = directory
+        self.memory_limit = int(memory_mb * 1024 * 1024)
+        self.disk_limit = int(disk_mb * 1024 * 1024)
+        self.report_every = report_every
+        self.lock = threading.Lock()
+        self.mem = OrderedDict()
+        self.mem_bytes = 0
+        self.hits_mem = self.hits_disk = self.misses = 0
+        self.disk_bytes = 0
+        if self.disk_limit:
+            os.makedirs(directory, exist_ok=True)
+            self.disk_bytes = sum(os.path.getsize(p) for p in self._disk_files())
+
+    @staticmethod
+    def key(engine, speaker, rate, text, model=""):
+        """model: identifies the weights (file, quantization), so another variant never reuses the audio."""
+        return hashlib.sha256(f"{engine}|{model}|{speaker}|{rate}|{text}".encode("utf-8")).hexdigest()
+
+    # --- Lookup ---
+    def get(self, key):
+        with self.lock:
+            item = self.mem.get(key)
+            if item:
+                self.mem.move_to_end(key)
+                self.hits_mem += 1
+                self._maybe_report()
+                return item
+        item = self._disk_get(key)
+        with self.lock:
+            if item:
+                self.hits_disk += 1
+                self._mem_put(key, item)
+            else:
+                self.misses += 1
+            self._maybe_report()
+        return item
+
+    def contains(self, key):
+        return key in self.mem or (self.disk_limit and os.path.exists(self._path(key)))
+
+    def put(self, key, fmt, rate, payload):
+        item = (fmt, rate, payload)
+        with self.lock:
+            self._mem_put(key, item)
+        if self.disk_limit: self._disk_put(key, item)
+
+    def stats(self):
+        total = self.hits_mem + self.hits_disk + self.misses
+        return {
+            "hits_memory": self.hits_mem,
+            "hits_disk": self.hits_disk,
+            "misses": self.misses,
+            "hit_rate": round((self.hits_mem + self.hits_disk) / total, 3) if total else 0.0,
+            "memory_entries": len(self.mem),
+            "memory_bytes": self.mem_bytes,
+            "disk_bytes": self.disk_bytes,
+        }
+
+    def _maybe_report(self):
+        total = self.hits_mem + self.hits_disk + self.misses
+        if total % self.report_every == 0:
+            LOGGER.info(f"TTS cache: {self.stats()}")
+
+    # --- Memory tier ---
+    def _mem_put(self, key, item):
+        if key in self.mem:
+            self.mem_bytes -= len(self.mem.pop(key)[2])
+        size = len(item[2])
+        if size > self.memory_limit: return
+        self.mem[key] = item
+        self.mem_bytes += size
+        while self.mem_bytes > self.memory_limit:
+            _, old = self.mem.popitem(last=False)
+            self.mem_bytes -= len(old[2])
+
+    # --- Disk tier ---
+    def _path(self, key):
+        return os.path.join(self.directory, f"{key}.tts")
+
+    def _disk_files(self):
+        return [os.path.join(self.directory, f) for f in os.listdir(self.directory) if f.endswith(".tts")]
+
+    def _disk_get(self, key):
+        if not self.disk_limit: return None
+        path = self._path(key)
+        try:
+            with open(path, "rb") as f:
+                header = json.loads(f.readline())
+                payload = zlib.decompress(f.read())
+            os.utime(path)  # recency for eviction
+            return header["fmt"], header["rate"], payload
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            LOGGER.warning(f"TTS cache entry unreadable, dropping: {e}")
+            try: os.remove(path)
+            except OSError: pass
+            return None
+
+    def _disk_put(self, key, item):
+        fmt, rate, payload = item
+        path = self._path(key)
+        tmp = f"{path}.{threading.get_ident()}.tmp"
+        try:
+            with open(tmp, "wb") as f:
+                f.write(json.dumps({"fmt": fmt, "rate": rate}).encode("utf-8") + b"\n")
+                f.write(zlib.compress(payload, 6))
+            old = os.path.getsize(path) if os.path.exists(path) else 0
+            os.replace(tmp, path)
+            with self.lock:
+                self.disk_bytes += os.path.getsize(path) - old
+                over = self.disk_bytes > self.disk_limit
+            if over: self._disk_evict()
+        except Exception as e:
+            LOGGER.warning(f"TTS cache write failed: {e}")
+            try: os.remove(tmp)
+            except OSError: pass
+
+    def _disk_evict(self):
+        # Drop least recently used files down to 90% of the cap
+        files = sorted(self._disk_files(), key=os.path.getmtime)
+        with self.lock:
+            self.disk_bytes = sum(os.path.getsize(p) for p in files)
+            for p in files:
+                if self.disk_bytes <= self.disk_limit * 0.9: break
+                try:
+                    size = os.path.getsize(p)
+                    os.remove(p)
+                    self.disk_bytes -= size
+                except OSError:
+                    pass
@@ -46,14 +46,12 @@ class MessageBubble(QFrame):
         super().__init__()
         l = QHBoxLayout(self)
         l.setContentsMargins(0,5,0,5)
-        lbl = QLabel(text)
+        self.lbl = lbl = QLabel(text)
         lbl.setWordWrap(True)
         lbl.setTextInteractionFlags(Qt.TextInteractionFlag.TextSelectableByMouse)
         font = QFont("Segoe UI", 11)
         lbl.setFont(font)
-        fm = QFontMetrics(font)
-        width = min(fm.horizontalAdvance(text) + 40, 600)
-        lbl.setMinimumWidth(max(50, width))
+        self._fit(text)
         lbl.setMaximumWidth(650)
         lbl.setSizePolicy(QSizePolicy.Policy.Minimum, QSizePolicy.Policy.Preferred)
         if role == "user":
@@ -65,6 +63,15 @@ class MessageBubble(QFrame):
             l.addWidget(lbl)
             l.addStretch()
 
+    def _fit(self, text):
+        width = min(QFontMetrics(self.lbl.font()).horizontalAdvance(text) + 40, 600)
+        self.lbl.setMinimumWidth(max(50, width))
+
+    def set_text(self, text):
+        """In-place update for a streamed answer."""
+        self.lbl.setText(text)
+        self._fit(text)
+
 class IoTDeviceDialog(QDialog):
     def __init__(self, data=None, parent=None):
         super().__init__(parent)
@@ -333,10 +340,18 @@ class MainWindow(QMainWindow):
         self.core = AssistantCore()
         self.core.sig_user_text.connect(self.add_user_msg)
         self.core.sig_bot_text.connect(self.add_bot_msg)
+        self.core.sig_bot_partial.connect(self.update_bot_msg)
+        self.core.sig_bot_answer.connect(self.finish_bot_msg)
+        self.streaming_bubbles = {}  # answer id -> bubble showing its partial text
         self.core.sig_status.connect(self.set_status)
         self.core.sig_mic_level.connect(self.set_mic)
         self.core.sig_timer_update.connect(self.update_timer)
         self.init_ui()
+        self.lbl_models = QLabel("")
+        self.lbl_models.setStyleSheet("color: #8e8ea0;")
+        self.statusBar().addPermanentWidget(self.lbl_models)
+        self.core.sig_models.connect(self.lbl_models.setText)
+        self.lbl_models.setText(self.core.models.summary())
 
     def init_ui(self):
         self.setStyleSheet(STYLE)
@@ -521,6 +536,24 @@ class MainWindow(QMainWindow):
         self.c_tts.addItems(["silero", "gtts", "pyttsx3"])
         self.c_tts.setCurrentText(self.cfg.get("tts_engine"))
         fl.addRow("Голос (TTS):", self.c_tts)
+        self.chk_tts_stream = QCheckBox("Говорити по реченнях (Silero)")
+        self.chk_tts_stream.setChecked(self.cfg.get("tts_streaming", False))
+        fl.addRow("", self.chk_tts_stream)
+
+        self.chk_barge_in = QCheckBox("Перебивати мову словом активації")
+        self.chk_barge_in.setChecked(self.cfg.get("tts_barge_in", False))
+        fl.addRow("", self.chk_barge_in)
+
+        self.chk_llm_stream = QCheckBox("Потокові відповіді LLM")
+        self.chk_llm_stream.setChecked(self.cfg.get("llm_streaming", False))
+        fl.addRow("", self.chk_llm_stream)
+
+        self.chk_llm_cache = QCheckBox("Кешувати відповіді LLM")
+        self.chk_llm_cache.setChecked(self.cfg.get("llm_cache", False))
+        fl.addRow("", self.chk_llm_cache)
+        self.chk_llm_warmup = QCheckBox("Прогрівати локальну LLM під час пошуку")
+        self.chk_llm_warmup.setChecked(self.cfg.get("llm_prefix_warmup", False))
+        fl.addRow("", self.chk_llm_warmup)
         self.c_llm = QComboBox()
         self.c_llm.addItems(["local", "gemini"])
         self.c_llm.setCurrentText(self.cfg.get("llm_backend"))
@@ -528,6 +561,18 @@ class MainWindow(QMainWindow):
         self.chk_wake = QCheckBox("Wake Word ('Петро')")
         self.chk_wake.setChecked(self.cfg.get("wake_word_enabled", True))
         fl.addRow("Активація:", self.chk_wake)
+        self.chk_gate = QCheckBox("Економний режим очікування (лише wake word)")
+        self.chk_gate.setChecked(self.cfg.get("wake_gate", False))
+        fl.addRow("", self.chk_gate)
+        self.chk_partial = QCheckBox("Миттєві команди (таймер, вікна, IoT)")
+        self.chk_partial.setChecked(self.cfg.get("partial_commands", False))
+        fl.addRow("Швидкість:", self.chk_partial)
+        self.chk_grammar = QCheckBox("Граматика команд (Vosk)")
+        self.chk_grammar.setChecked(self.cfg.get("command_grammar", False))
+        fl.addRow("", self.chk_grammar)
+        self.chk_vad = QCheckBox("Пропускати тишу (VAD)")
+        self.chk_vad.setChecked(self.cfg.get("vad_enabled", False))
+        fl.addRow("", self.chk_vad)
         self.i_key = QLineEdit(self.cfg.get("gemini_key"))
         self.i_key.setEchoMode(QLineEdit.EchoMode.Password)
         fl.addRow("Gemini Key:", self.i_key)
@@ -653,6 +698,26 @@ class MainWindow(QMainWindow):
         self.chat_layout.addWidget(MessageBubble(text, "bot"))
         self.scroll_chat()
 
+    @pyqtSlot(int, str)
+    def update_bot_msg(self, answer_id, text):
+        bubble = self.streaming_bubbles.get(answer_id)
+        if not bubble:
+            bubble = self.streaming_bubbles[answer_id] = MessageBubble(text, "bot")
+            self.chat_layout.addWidget(bubble)
+        else:
+            bubble.set_text(text)
+        self.scroll_chat()
+
+    @pyqtSlot(int, str)
+    def finish_bot_msg(self, answer_id, text):
+        # Final text of a streamed answer replaces its own partial bubble only
+        bubble = self.streaming_bubbles.pop(answer_id, None)
+        if bubble:
+            bubble.set_text(text)
+            self.scroll_chat()
+        else:
+            self.add_bot_msg(text)
+
     def scroll_chat(self):
         self.chat_scroll.verticalScrollBar().setValue(self.chat_scroll.verticalScrollBar().maximum())
 
@@ -666,8 +731,17 @@ class MainWindow(QMainWindow):
     def save_settings(self):
         self.cfg.set("stt_backend", self.c_stt.currentText())
         self.cfg.set("tts_engine", self.c_tts.currentText())
+        self.cfg.set("tts_streaming", self.chk_tts_stream.isChecked())
+        self.cfg.set("tts_barge_in", self.chk_barge_in.isChecked())
+        self.cfg.set("llm_streaming", self.chk_llm_stream.isChecked())
+        self.cfg.set("llm_cache", self.chk_llm_cache.isChecked())
+        self.cfg.set("llm_prefix_warmup", self.chk_llm_warmup.isChecked())
         self.cfg.set("llm_backend", self.c_llm.currentText())
         self.cfg.set("gemini_key", self.i_key.text())
         self.cfg.set("wake_word_enabled", self.chk_wake.isChecked())
-        self.core.tts = self.core.tts.__class__(self.cfg) # Re-init TTS
+        self.cfg.set("wake_gate", self.chk_gate.isChecked())
+        self.cfg.set("partial_commands", self.chk_partial.isChecked())
+        self.cfg.set("command_grammar", self.chk_grammar.isChecked())
+        self.cfg.set("vad_enabled", self.chk_vad.isChecked())
+        self.core.tts.apply_settings()  # releases Silero when another engine is chosen
         QMessageBox.information(self, "Info", "Saved")
\ No newline at end of file